@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the EC2 system."""
+from __future__ import absolute_import
+
+import threading
+
+import pytest
+from mock import MagicMock
+
+from wrapanapi.systems.ec2 import EC2System, MAX_BATCH_SIZE
+
+
+class StubS3Client(object):
+    """Records the delete_objects batches, fails the keys in ``failing_keys``"""
+
+    def __init__(self, failing_keys=(), raise_for_batch=None):
+        self.failing_keys = set(failing_keys)
+        self.raise_for_batch = raise_for_batch
+        self.batches = []
+        self.completed = 0
+        self.lock = threading.Lock()
+
+    def delete_objects(self, Bucket, Delete):
+        keys = [obj['Key'] for obj in Delete['Objects']]
+        with self.lock:
+            self.batches.append(keys)
+            index = len(self.batches) - 1
+        try:
+            if index == self.raise_for_batch:
+                raise Exception('connection reset')
+            return {'Errors': [{'Key': key, 'Code': 'AccessDenied', 'Message': 'Access Denied'}
+                               for key in keys if key in self.failing_keys]}
+        finally:
+            with self.lock:
+                self.completed += 1
+
+
+@pytest.fixture
+def system():
+    system = EC2System(username='user', password='password', region='us-east-1')
+    system.logger = MagicMock()
+    return system
+
+
+def keys(count):
+    return ['key-{}'.format(i) for i in range(count)]
+
+
+@pytest.mark.parametrize('count', [MAX_BATCH_SIZE, 3 * MAX_BATCH_SIZE])
+def test_delete_s3_objects_exact_batches(system, count):
+    system.s3_client = StubS3Client()
+
+    result = system.delete_s3_objects('bucket', object_keys=keys(count))
+
+    assert result == {'deleted': count, 'errors': {}}
+    assert sorted(len(batch) for batch in system.s3_client.batches) == \
+        [MAX_BATCH_SIZE] * (count // MAX_BATCH_SIZE)
+    assert sorted(key for batch in system.s3_client.batches for key in batch) == sorted(keys(count))
+
+
+def test_delete_s3_objects_more_than_a_batch(system):
+    system.s3_client = StubS3Client()
+
+    result = system.delete_s3_objects('bucket', object_keys=keys(2 * MAX_BATCH_SIZE + 1))
+
+    assert result == {'deleted': 2 * MAX_BATCH_SIZE + 1, 'errors': {}}
+    assert sorted(len(batch) for batch in system.s3_client.batches) == \
+        [1, MAX_BATCH_SIZE, MAX_BATCH_SIZE]
+
+
+def test_delete_s3_objects_bounds_the_pending_batches(system):
+    max_concurrency = 2
+    client = system.s3_client = StubS3Client()
+    produced = []
+    overrun = []
+
+    def listing():
+        for key in keys(20 * MAX_BATCH_SIZE):
+            # never more than 2 * max_concurrency batches waiting, plus the one being filled
+            if len(produced) >= (client.completed + 2 * max_concurrency + 1) * MAX_BATCH_SIZE:
+                overrun.append(len(produced))
+            produced.append(key)
+            yield key
+
+    result = system.delete_s3_objects('bucket', object_keys=listing(),
+                                      max_concurrency=max_concurrency)
+
+    assert result == {'deleted': 20 * MAX_BATCH_SIZE, 'errors': {}}
+    assert not overrun
+
+
+def test_delete_s3_objects_aggregates_errors(system):
+    all_keys = keys(3 * MAX_BATCH_SIZE)
+    failing = ['key-1', 'key-1500']
+    # the third delete_objects call fails as a whole
+    system.s3_client = StubS3Client(failing_keys=failing, raise_for_batch=2)
+
+    result = system.delete_s3_objects('bucket', object_keys=all_keys, max_concurrency=1)
+
+    failed_batch = system.s3_client.batches[2]
+    expected_errors = {key: 'connection reset' for key in failed_batch}
+    expected_errors.update({key: 'Access Denied' for key in failing})
+    assert result['errors'] == expected_errors
+    assert result['deleted'] == len(all_keys) - len(expected_errors)
+    assert system.logger.error.call_count == len(expected_errors)
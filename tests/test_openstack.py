@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the OpenStack system."""
+from __future__ import absolute_import
+
+import pytest
+from cinderclient import exceptions as cinder_exceptions
+from mock import MagicMock
+from novaclient import exceptions as os_exceptions
+
+from wrapanapi.systems.openstack import OpenstackSystem
+
+
+class FakeListing(object):
+    """A marker/limit listing of items with an ``id``, like the nova/cinder ``list`` calls"""
+
+    def __init__(self, count, bad_request=os_exceptions.BadRequest):
+        self.items = [MagicMock(id='item-{:03d}'.format(i)) for i in range(count)]
+        self.bad_request = bad_request
+        self.calls = []
+
+    def __call__(self, marker=None, limit=None):
+        self.calls.append(marker)
+        ids = [item.id for item in self.items]
+        if marker is None:
+            start = 0
+        elif marker in ids:
+            start = ids.index(marker) + 1
+        else:
+            raise self.bad_request(400, 'marker {} not found'.format(marker))
+        return self.items[start:start + limit]
+
+    def delete(self, item_id):
+        self.items = [item for item in self.items if item.id != item_id]
+
+
+@pytest.fixture
+def system():
+    system = OpenstackSystem.__new__(OpenstackSystem)
+    system.page_size = 3
+    return system
+
+
+def ids(items):
+    return [item.id for item in items]
+
+
+def test_paginator_exact_multiple_of_page_size(system):
+    listing = FakeListing(9)
+
+    assert ids(system._generic_paginator(listing)) == ids(listing.items)
+    # three full pages, and an empty one to confirm the end
+    assert len(listing.calls) == 4
+
+
+def test_paginator_short_final_page(system):
+    listing = FakeListing(7)
+
+    assert ids(system._generic_paginator(listing)) == ids(listing.items)
+    # the short third page ends the listing without another request
+    assert listing.calls == [None, 'item-002', 'item-005']
+
+
+def test_paginator_short_first_page_is_confirmed(system):
+    listing = FakeListing(2)
+
+    assert ids(system._generic_paginator(listing)) == ids(listing.items)
+    assert listing.calls == [None, 'item-001']
+
+
+@pytest.mark.parametrize('bad_request', [os_exceptions.BadRequest, cinder_exceptions.BadRequest])
+def test_paginator_marker_deleted_mid_listing(system, bad_request):
+    listing = FakeListing(10, bad_request=bad_request)
+    expected = ids(listing.items)
+    generated = []
+
+    for item in system._generic_paginator(listing):
+        generated.append(item.id)
+        if item.id == 'item-005':
+            # the marker of the next page disappears before it is requested
+            listing.delete('item-005')
+
+    assert generated == expected
+    assert listing.calls == [None, 'item-002', 'item-005', 'item-004', 'item-008']
+
+
+def test_paginator_gives_up_after_10_markers(system):
+    listing = FakeListing(30, bad_request=cinder_exceptions.BadRequest)
+    paginator = system._generic_paginator(listing, limit=15)
+    generated = [next(paginator) for _ in range(15)]
+    for item_id in ids(listing.items[:15]):
+        listing.delete(item_id)
+
+    with pytest.raises(Exception) as error:
+        next(paginator)
+
+    assert 'after 10 marker tries' in str(error.value)
+    assert ids(generated) == ['item-{:03d}'.format(i) for i in range(15)]
+    assert len(listing.calls) == 11
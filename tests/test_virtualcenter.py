@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for the vSphere system."""
+from __future__ import absolute_import
+
+from collections import Counter
+
+import pytest
+from mock import MagicMock, patch
+from pyVmomi import vim
+
+from wrapanapi.systems.virtualcenter import DatastorePlacement, VMWareVirtualMachine
+
+GB = 1024 ** 3
+
+
+@pytest.fixture
+def datastore_props():
+    """name -> properties of the datastores, as returned by _retrieve_properties"""
+    return {
+        name: {
+            'name': name,
+            'overallStatus': 'green',
+            'summary.accessible': True,
+            'summary.multipleHostAccess': True,
+            'summary.capacity': 100 * GB,
+            'summary.freeSpace': 50 * GB,
+        }
+        for name in ('ds1', 'ds2', 'ds3', 'ds4')
+    }
+
+
+def fake_system(datastore_props, session_key=('hostname', 'vc.example.com')):
+    system = MagicMock()
+    system._session_key = session_key
+    system._retrieve_properties.side_effect = lambda *args, **kwargs: [
+        (MagicMock(name=name), props) for name, props in datastore_props.items()]
+    return system
+
+
+def test_reserve_spreads_picks_over_allowed_datastores(datastore_props):
+    placement = DatastorePlacement(fake_system(datastore_props))
+    allowed = ['ds1', 'ds2', 'ds3']
+
+    reservations = [placement.reserve(allowed, size=5 * GB) for _ in range(9)]
+
+    assert Counter(r.name for r in reservations) == {'ds1': 3, 'ds2': 3, 'ds3': 3}
+
+
+def test_reserve_skips_unusable_and_full_datastores(datastore_props):
+    datastore_props['ds1']['summary.accessible'] = False
+    datastore_props['ds2']['summary.freeSpace'] = 1 * GB
+    placement = DatastorePlacement(fake_system(datastore_props))
+
+    reservations = [placement.reserve(['ds1', 'ds2', 'ds3'], size=5 * GB) for _ in range(3)]
+
+    assert set(r.name for r in reservations) == {'ds3'}
+
+
+def test_release_frees_the_reserved_space(datastore_props):
+    placement = DatastorePlacement(fake_system(datastore_props))
+    first = placement.reserve(['ds1', 'ds2'], size=10 * GB)
+    placement.release(first)
+
+    assert placement.reserve(['ds1', 'ds2'], size=10 * GB).name == first.name
+
+
+def test_placement_is_shared_by_systems_of_the_same_session_key(datastore_props):
+    key = ('hostname', 'shared.example.com')
+    first = DatastorePlacement.get(fake_system(datastore_props, session_key=key))
+    second = DatastorePlacement.get(fake_system(datastore_props, session_key=key))
+    other = DatastorePlacement.get(fake_system(datastore_props, session_key=('other',)))
+
+    assert first is second
+    assert other is not first
+    # reservations made through one system are seen by the other
+    names = [placement.reserve(['ds1', 'ds2'], size=5 * GB).name
+             for placement in (first, second)]
+    assert sorted(names) == ['ds1', 'ds2']
+
+
+def scsi_controller(key, bus_number, used_units=()):
+    """A SCSI controller and the disks on its ``used_units``"""
+    controller = vim.vm.device.ParaVirtualSCSIController(key=key, busNumber=bus_number)
+    disks = [vim.vm.device.VirtualDisk(key=key * 100 + unit, controllerKey=key, unitNumber=unit)
+             for unit in used_units]
+    return [controller] + disks
+
+
+def add_disks(devices, capacities_in_kb):
+    """Run add_disks on a VM with ``devices``, returns the deviceChange of its config spec"""
+    raw = MagicMock()
+    raw.name = 'vm'
+    raw.config.hardware.device = devices
+    vm = VMWareVirtualMachine(system=MagicMock(), raw=raw)
+    with patch.object(vm, 'refresh'), patch.object(vm, '_reconfigure') as reconfigure:
+        vm.add_disks(capacities_in_kb)
+    return reconfigure.call_args[0][0].deviceChange
+
+
+def added_disks(device_changes):
+    return [(change.device.controllerKey, change.device.unitNumber, change.device.capacityInKB)
+            for change in device_changes if isinstance(change.device, vim.vm.device.VirtualDisk)]
+
+
+def added_controllers(device_changes):
+    return [(change.device.key, change.device.busNumber) for change in device_changes
+            if isinstance(change.device, vim.vm.device.VirtualSCSIController)]
+
+
+def test_add_disks_skips_the_controller_unit():
+    devices = scsi_controller(1000, 0, used_units=range(7))
+
+    changes = add_disks(devices, [1024, 2048])
+
+    assert added_controllers(changes) == []
+    assert added_disks(changes) == [(1000, 8, 1024), (1000, 9, 2048)]
+
+
+def test_add_disks_spills_onto_a_new_controller_when_full():
+    full = [unit for unit in range(16) if unit != 7]
+    devices = scsi_controller(1000, 0, used_units=full[:-1])
+
+    changes = add_disks(devices, [1024, 2048, 4096])
+
+    # the new controller takes the next free bus, and is added before its disks
+    assert added_controllers(changes) == [(-100, 1)]
+    assert changes[1].device.key == -100
+    assert isinstance(changes[1].device, vim.vm.device.ParaVirtualSCSIController)
+    assert added_disks(changes) == [(1000, 15, 1024), (-100, 0, 2048), (-100, 1, 4096)]
+
+
+def test_add_disks_adds_a_controller_to_a_vm_without_one():
+    devices = [vim.vm.device.VirtualIDEController(key=200, busNumber=0),
+               vim.vm.device.VirtualDisk(key=3000, controllerKey=200, unitNumber=0)]
+
+    changes = add_disks(devices, [1024])
+
+    assert added_controllers(changes) == [(-100, 0)]
+    assert added_disks(changes) == [(-100, 0, 1024)]
+
+
+def test_add_disks_fails_when_all_buses_are_full():
+    full = [unit for unit in range(16) if unit != 7]
+    devices = [device for bus in range(4)
+               for device in scsi_controller(1000 + bus, bus, used_units=full)]
+
+    with pytest.raises(ValueError):
+        add_disks(devices, [1024])
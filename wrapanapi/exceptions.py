@@ -147,6 +147,10 @@ class VMError(Exception):
     """Raised when a VM goes to the ERROR state."""
 
 
+class ImageTaskError(Exception):
+    """Raised when an image import or copy task fails."""
+
+
 class VMCreationDateError(Exception):
     """Raised when we cannot determine a creation date for a VM"""
     pass
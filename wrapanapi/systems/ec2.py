@@ -1,9 +1,13 @@
 # coding: utf-8
 from __future__ import absolute_import
 
+import hashlib
 import os
+import random
 import re
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
 import boto
 from boto import sqs
@@ -11,19 +15,149 @@ from boto.ec2 import EC2Connection, elb, get_region
 from boto.ec2.elb import ELBConnection
 from boto.sqs import connection
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
-from botocore.exceptions import ClientError
+from botocore.exceptions import ClientError, WaiterError
+from cached_property import cached_property
 import pytz
 
 from wrapanapi.entities import (Instance, Stack, StackMixin, Template,
                                 TemplateMixin, VmMixin, VmState)
 from wrapanapi.exceptions import (ActionTimedOutError, ImageNotFoundError,
-                                  MultipleImagesError, MultipleInstancesError,
+                                  ImageTaskError, MultipleImagesError, MultipleInstancesError,
                                   MultipleItemsError, NotFoundError,
                                   VMInstanceNotFound)
 from wrapanapi.systems.base import System
 
 
+# MaxResults used for paginated describe_* calls
+DEFAULT_PAGE_SIZE = 1000
+# Max number of ids accepted by a single bulk EC2/S3 call
+MAX_BATCH_SIZE = 1000
+# Max number of values of a single EC2 describe_* filter
+MAX_FILTER_VALUES = 200
+# Defaults for multipart S3 transfers
+S3_CHUNK_SIZE = 64 * 1024 * 1024
+S3_MAX_CONCURRENCY = 10
+
+
+_connection_cache = {}
+_connection_cache_lock = threading.Lock()
+
+
+def _cached_connection(key, factory):
+    """
+    Get a connection from the process-wide cache, creating it with ``factory`` if needed
+
+    Shared by all EC2System instances, so systems with the same credentials and region
+    don't each pay for the endpoint/model loading of a new client. Creation happens under a
+    lock as boto3's default session is not safe to create clients from concurrently.
+    """
+    with _connection_cache_lock:
+        if key not in _connection_cache:
+            _connection_cache[key] = factory()
+        return _connection_cache[key]
+
+
+_thread_resources = threading.local()
+
+
+def _thread_resource(key, factory):
+    """
+    Get a boto3 resource cached for the current thread, creating it with ``factory`` if needed
+
+    boto3 resources are not thread safe, so each thread gets its own. They are kept in a
+    thread local, so they are dropped with short lived (e.g. ThreadPoolExecutor) threads.
+    """
+    resources = getattr(_thread_resources, 'resources', None)
+    if resources is None:
+        resources = _thread_resources.resources = {}
+    if key not in resources:
+        with _connection_cache_lock:
+            resources[key] = factory()
+    return resources[key]
+
+
+def _chunks(items, size):
+    """Split ``items`` into lists of at most ``size`` items"""
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _file_checksums(file_path, chunk_size):
+    """
+    Returns (md5 hexdigest, S3 ETag) of a file, the ETag being the one S3 computes for an
+    upload in parts of ``chunk_size``
+    """
+    md5 = hashlib.md5()
+    part_digests = []
+    size = 0
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            md5.update(chunk)
+            part_digests.append(hashlib.md5(chunk).digest())
+            size += len(chunk)
+    # s3transfer uploads files of at least the threshold (chunk_size) in parts, even when
+    # that is a single part
+    if size < chunk_size:
+        etag = md5.hexdigest()
+    else:
+        etag = '{}-{}'.format(hashlib.md5(b''.join(part_digests)).hexdigest(), len(part_digests))
+    return md5.hexdigest(), etag
+
+
+THROTTLING_ERROR_CODES = ('Throttling', 'ThrottlingException', 'RequestLimitExceeded',
+                          'TooManyRequestsException')
+# network_snapshot category -> (client attribute, operation, result key, ID key)
+NETWORK_RESOURCES = {
+    'vpcs': ('ec2_connection', 'describe_vpcs', 'Vpcs', 'VpcId'),
+    'subnets': ('ec2_connection', 'describe_subnets', 'Subnets', 'SubnetId'),
+    'route_tables': ('ec2_connection', 'describe_route_tables', 'RouteTables', 'RouteTableId'),
+    'security_groups': ('ec2_connection', 'describe_security_groups', 'SecurityGroups', 'GroupId'),
+    'load_balancers': (
+        'elb_client', 'describe_load_balancers', 'LoadBalancerDescriptions', 'LoadBalancerName'),
+}
+
+
+def _call_with_backoff(func, max_attempts=8, **kwargs):
+    """
+    Call an AWS API function, retrying with exponential backoff (and jitter) while throttled
+    """
+    for attempt in range(max_attempts):
+        try:
+            return func(**kwargs)
+        except ClientError as error:
+            if (error.response['Error']['Code'] not in THROTTLING_ERROR_CODES
+                    or attempt == max_attempts - 1):
+                raise
+            time.sleep(min(2 ** attempt, 30) * random.uniform(0.5, 1.5))
+
+
+def _paginate(client, operation, result_key, page_size=None, **kwargs):
+    """
+    Generates the items under ``result_key`` of all pages of a boto3 client operation
+
+    Falls back to a single call for operations the installed botocore can't paginate.
+    """
+    if client.can_paginate(operation):
+        if page_size:
+            kwargs['PaginationConfig'] = {'PageSize': page_size}
+        pages = client.get_paginator(operation).paginate(**kwargs)
+    else:
+        pages = [getattr(client, operation)(**kwargs)]
+    for page in pages:
+        for item in page.get(result_key, []):
+            yield item
+
+
+def _get_tag_value(tags, key):
+    """Get the value of tag ``key`` from a boto3 list of tag dicts, or None"""
+    for tag in tags or []:
+        if tag['Key'] == key:
+            return tag['Value']
+    return None
+
+
 def _regions(regionmodule, regionname):
     for region in regionmodule.regions():
         if region.name == regionname:
@@ -47,7 +181,7 @@ class EC2Instance(Instance):
 
         Args:
             system: an EC2System object
-            raw: the boto.ec2.instance.Instance object if already obtained, or None
+            raw: the boto3 EC2.Instance resource if already obtained, or None
             uuid: unique ID of instance
         """
 
@@ -57,7 +191,7 @@ class EC2Instance(Instance):
 
         super(EC2Instance, self).__init__(system, raw, **kwargs)
 
-        self._api = self.system.api
+        self._api = self.system.ec2_connection
 
     @property
     def _identifying_attrs(self):
@@ -65,7 +199,7 @@ class EC2Instance(Instance):
 
     @property
     def name(self):
-        return self.raw.tags.get('Name', self.raw.id)
+        return _get_tag_value(self.raw.tags, 'Name') or self.raw.id
 
     @property
     def uuid(self):
@@ -77,12 +211,12 @@ class EC2Instance(Instance):
 
     def _get_state(self):
         self.refresh()
-        return self._api_state_to_vmstate(self.raw.state)
+        return self._api_state_to_vmstate(self.raw.state['Name'])
 
     @property
     def ip(self):
         self.refresh()
-        return self.raw.ip_address
+        return self.raw.public_ip_address
 
     @property
     def type(self):
@@ -90,14 +224,12 @@ class EC2Instance(Instance):
 
     @property
     def creation_time(self):
-        # Example instance.launch_time: 2014-08-13T22:09:40.000Z
-        launch_time = datetime.strptime(self.raw.launch_time, '%Y-%m-%dT%H:%M:%S.%fZ')
-        # use replace here to make tz-aware. python doesn't handle single 'Z' as UTC
-        return launch_time.replace(tzinfo=pytz.UTC)
+        # boto3 parses launch_time into a tz-aware datetime
+        return self.raw.launch_time.astimezone(pytz.UTC)
 
     def rename(self, new_name):
         self.logger.info("setting name of EC2 instance %s to %s", self.uuid, new_name)
-        self.raw.add_tag('Name', new_name)
+        self.raw.create_tags(Tags=[{'Key': 'Name', 'Value': new_name}])
         self.refresh()  # update raw
         return new_name
 
@@ -233,10 +365,19 @@ class CloudFormationStack(Stack):
     def get_details(self):
         return self.raw
 
-    def refresh(self):
+    def refresh(self, from_index=False):
         """
         Re-pull the data for this stack
+
+        Args:
+            from_index (bool): serve the data from the system's stack index, which is loaded
+                for all stacks at once (see EC2System.refresh_stacks), if it has this stack
         """
+        if from_index:
+            raw = self.system._get_stack_index()['by_id'].get(self._uuid)
+            if raw:
+                self.raw = raw
+                return self.raw
         try:
             self.raw = self._api.describe_stacks(StackName=self._uuid)['Stacks'][0]
         except boto.exception.BotoServerError as error:
@@ -244,6 +385,10 @@ class CloudFormationStack(Stack):
                 raise NotFoundError('stack {}'.format(self._uuid))
             else:
                 raise
+        except ClientError as error:
+            if 'does not exist' in str(error):
+                raise NotFoundError('stack {}'.format(self._uuid))
+            raise
         except IndexError:
             raise NotFoundError('stack {}'.format(self._uuid))
         return self.raw
@@ -258,10 +403,11 @@ class CloudFormationStack(Stack):
         """
         self.logger.info("terminating EC2 stack '%s', id: '%s'", self.name, self.uuid)
         try:
-            self._api.delete_stack(self.uuid)
-            return True
+            self._api.delete_stack(StackName=self.uuid)
         except ActionTimedOutError:
             return False
+        self.system._forget_stack(self.uuid)
+        return True
 
     def cleanup(self):
         """
@@ -277,7 +423,7 @@ class EC2Image(Template):
 
         Args:
             system: an EC2System object
-            raw: the boto.ec2.image.Image object if already obtained, or None
+            raw: the boto3 EC2.Image resource if already obtained, or None
             uuid: unique ID of the image
         """
         self._uuid = raw.id if raw else kwargs.get('uuid')
@@ -286,7 +432,7 @@ class EC2Image(Template):
 
         super(EC2Image, self).__init__(system, raw, **kwargs)
 
-        self._api = self.system.api
+        self._api = self.system.ec2_connection
 
     @property
     def _identifying_attrs(self):
@@ -294,30 +440,44 @@ class EC2Image(Template):
 
     @property
     def name(self):
-        return self.raw.tags.get('Name', self.raw.id)
+        return _get_tag_value(self.raw.tags, 'Name') or self.raw.id
 
     @property
     def uuid(self):
         return self._uuid
 
     def refresh(self):
-        image = self._api.get_image(self._uuid)
-        if not image:
+        try:
+            images = self._api.describe_images(ImageIds=[self._uuid])['Images']
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('InvalidAMIID.NotFound',
+                                                   'InvalidAMIID.Unavailable'):
+                raise ImageNotFoundError(self._uuid)
+            raise
+        if not images:
             raise ImageNotFoundError(self._uuid)
-        self.raw = image
+        self.raw = self.system._image_resource(images[0])
         return self.raw
 
     def delete(self):
         """
         Deregister the EC2 image
         """
-        return self.raw.deregister()
+        self.raw.deregister()
+        self.system.image_catalogue.remove(self._uuid)
+        return True
 
     def cleanup(self):
         """
         Deregister the EC2 image and delete the snapshot
         """
-        return self.raw.deregister(delete_snapshot=True)
+        snapshot_ids = [
+            mapping['Ebs']['SnapshotId'] for mapping in self.raw.block_device_mappings or []
+            if mapping.get('Ebs', {}).get('SnapshotId')]
+        self.delete()
+        for snapshot_id in snapshot_ids:
+            self._api.delete_snapshot(SnapshotId=snapshot_id)
+        return True
 
     def deploy(self, *args, **kwargs):
         """
@@ -329,6 +489,430 @@ class EC2Image(Template):
         return self.system.create_vm(image_id=self.uuid, *args, **kwargs)
 
 
+class EC2ImageCatalogue(object):
+    """
+    Cache of the images visible in one region, indexed by id, name and owner
+
+    Each scope of images (see ``SCOPES``) is loaded with one (paginated) describe_images
+    call and kept for ``ttl`` seconds, so lookups by name or id are served from memory.
+    Lookups which miss the cache fall back to a describe_images call filtered on that one
+    name/id, so freshly registered images are found without a full reload.
+    """
+    SCOPES = {
+        'public': {},
+        'executable': {'ExecutableUsers': ['self']},
+        'owned': {'Owners': ['self']},
+    }
+
+    def __init__(self, system, ttl=300):
+        """
+        Args:
+            system: instance of EC2System
+            ttl: seconds after which a scope is loaded again
+        """
+        self.system = system
+        self.ttl = ttl
+        self._indexes = {}  # scope -> index dict
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _new_index():
+        return {'loaded_at': time.time(), 'by_id': {}, 'by_name': {}, 'by_owner': {}}
+
+    @staticmethod
+    def _add_to_index(index, images):
+        for image in images:
+            index['by_id'][image['ImageId']] = image
+            index['by_name'].setdefault(image.get('Name'), {})[image['ImageId']] = image
+            index['by_owner'].setdefault(image.get('OwnerId'), {})[image['ImageId']] = image
+
+    def describe_images(self, scope, **kwargs):
+        """Query the API for images of ``scope``, bypassing the cache"""
+        kwargs.update(self.SCOPES[scope])
+        try:
+            return list(_paginate(self.system.ec2_connection, 'describe_images', 'Images',
+                                  **kwargs))
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('InvalidAMIID.NotFound',
+                                                   'InvalidAMIID.Malformed'):
+                return []
+            raise
+
+    def _index(self, scope):
+        with self._lock:
+            index = self._indexes.get(scope)
+            if index is None or time.time() - index['loaded_at'] > self.ttl:
+                index = self._new_index()
+                self._add_to_index(index, self.describe_images(scope))
+                self._indexes[scope] = index
+            return index
+
+    def refresh(self, scope=None):
+        """Drop the cached images of ``scope`` (all scopes by default), to reload them"""
+        with self._lock:
+            if scope:
+                self._indexes.pop(scope, None)
+            else:
+                self._indexes.clear()
+
+    def remove(self, image_id):
+        """Drop a deregistered image from all scopes"""
+        with self._lock:
+            for index in self._indexes.values():
+                image = index['by_id'].pop(image_id, None)
+                if image:
+                    index['by_name'].get(image.get('Name'), {}).pop(image_id, None)
+                    index['by_owner'].get(image.get('OwnerId'), {}).pop(image_id, None)
+
+    def images(self, scope):
+        """Returns the raw image dicts of ``scope``"""
+        return list(self._index(scope)['by_id'].values())
+
+    def find(self, scope, image_id=None, name=None, owner=None):
+        """
+        Find images of ``scope`` by one of id, name or owner
+
+        Returns:
+            list of raw image dicts
+        """
+        index = self._index(scope)
+        if image_id:
+            matches = [index['by_id'][image_id]] if image_id in index['by_id'] else []
+        elif name:
+            matches = list(index['by_name'].get(name, {}).values())
+        elif owner:
+            return list(index['by_owner'].get(owner, {}).values())
+        else:
+            raise ValueError("missing one of required kwargs: image_id, name, owner")
+
+        if not matches:
+            # the image may have been registered after the scope was loaded
+            if image_id:
+                matches = self.describe_images(scope, ImageIds=[image_id])
+            else:
+                matches = self.describe_images(
+                    scope, Filters=[{'Name': 'name', 'Values': [name]}])
+            with self._lock:
+                self._add_to_index(index, matches)
+        return matches
+
+
+class EC2OrphanSweeper(object):
+    """
+    Finds and deletes resources which are not used by anything anymore
+
+    Each category is discovered concurrently through boto3 paginators, and resources are
+    deleted with bounded concurrency, backing off while the API is throttling us.
+
+    Categories:
+        addresses: elastic IPs not associated with an instance or network interface
+        volumes: EBS volumes in 'available' state
+        load_balancers: classic load balancers without instances
+        network_interfaces: network interfaces in 'available' state
+    """
+    CATEGORIES = ('addresses', 'volumes', 'load_balancers', 'network_interfaces')
+    _DELETERS = {
+        'addresses': '_delete_address',
+        'volumes': '_delete_volume',
+        'load_balancers': '_delete_load_balancer',
+        'network_interfaces': '_delete_network_interface',
+    }
+
+    def __init__(self, system, max_concurrency=10):
+        """
+        Args:
+            system: instance of EC2System
+            max_concurrency (int): max number of delete calls running in parallel
+        """
+        self.system = system
+        self.max_concurrency = max_concurrency
+        self.logger = system.logger
+
+    @property
+    def _ec2(self):
+        return self.system.ec2_connection
+
+    @property
+    def _elb(self):
+        return self.system.elb_client
+
+    def _find_addresses(self):
+        # describe_addresses is not paginated, it returns all addresses at once
+        return [
+            address.get('AllocationId') or address['PublicIp']
+            for address in self._ec2.describe_addresses()['Addresses']
+            if not address.get('InstanceId') and not address.get('NetworkInterfaceId')]
+
+    def _delete_address(self, address_id):
+        if address_id.startswith('eipalloc-'):
+            _call_with_backoff(self._ec2.release_address, AllocationId=address_id)
+        else:
+            # EC2-Classic address
+            _call_with_backoff(self._ec2.release_address, PublicIp=address_id)
+
+    def _find_volumes(self):
+        return [
+            volume['VolumeId'] for volume in _paginate(
+                self._ec2, 'describe_volumes', 'Volumes', page_size=self.system.page_size,
+                Filters=[{'Name': 'status', 'Values': ['available']}])]
+
+    def _delete_volume(self, volume_id):
+        _call_with_backoff(self._ec2.delete_volume, VolumeId=volume_id)
+
+    def _find_load_balancers(self):
+        return [
+            load_balancer['LoadBalancerName'] for load_balancer in _paginate(
+                self._elb, 'describe_load_balancers', 'LoadBalancerDescriptions')
+            if not load_balancer.get('Instances')]
+
+    def _delete_load_balancer(self, name):
+        _call_with_backoff(self._elb.delete_load_balancer, LoadBalancerName=name)
+
+    def _find_network_interfaces(self):
+        return [
+            interface['NetworkInterfaceId'] for interface in _paginate(
+                self._ec2, 'describe_network_interfaces', 'NetworkInterfaces',
+                Filters=[{'Name': 'status', 'Values': ['available']}])]
+
+    def _delete_network_interface(self, interface_id):
+        _call_with_backoff(self._ec2.delete_network_interface, NetworkInterfaceId=interface_id)
+
+    def find(self, categories=None):
+        """
+        Discover orphaned resources, all categories concurrently
+
+        Returns:
+            dict of category -> list of resource ids (names for load balancers)
+        """
+        categories = categories or self.CATEGORIES
+        with ThreadPoolExecutor(max_workers=len(categories)) as executor:
+            futures = {
+                category: executor.submit(getattr(self, '_find_{}'.format(category)))
+                for category in categories}
+            return {category: future.result() for category, future in futures.items()}
+
+    def sweep(self, categories=None, dry_run=True):
+        """
+        Discover and delete orphaned resources
+
+        Args:
+            categories (list): categories to sweep, defaults to all of ``CATEGORIES``
+            dry_run (bool): only report what would be deleted
+        Returns:
+            dict of category -> dict with the 'found' resources, the 'deleted' ones and the
+            'errors' as a dict of resource -> error message
+        """
+        found = self.find(categories)
+        report = {
+            category: {'found': resources, 'deleted': [], 'errors': {}}
+            for category, resources in found.items()}
+        if dry_run:
+            for category, resources in found.items():
+                self.logger.info("Dry run: would delete %d %s: %s",
+                                 len(resources), category, resources)
+            return report
+
+        def _delete(category, resource):
+            self.logger.info(" Deleting orphaned %s '%s'", category, resource)
+            getattr(self, self._DELETERS[category])(resource)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = {
+                executor.submit(_delete, category, resource): (category, resource)
+                for category, resources in found.items() for resource in resources}
+            for future, (category, resource) in futures.items():
+                try:
+                    future.result()
+                    report[category]['deleted'].append(resource)
+                except Exception as error:
+                    self.logger.error("Deleting %s '%s' failed: %s", category, resource, error)
+                    report[category]['errors'][resource] = str(error)
+        return report
+
+
+class ImageTaskTracker(object):
+    """
+    Tracks many image import and copy tasks at once
+
+    Each submitted task gets a Future resolving to the resulting AMI id. A single background
+    thread polls all pending tasks of a region with one describe_import_image_tasks (imports)
+    and one describe_images (copies) call per interval, instead of one call per task.
+
+    Copies are tracked in the region they copy to, so one tracker can follow tasks of
+    many regions by passing the region's EC2System as ``system``.
+    """
+    FAILED_IMPORT_STATES = ('deleting', 'deleted')
+    FAILED_IMAGE_STATES = ('invalid', 'deregistered', 'failed', 'error')
+
+    def __init__(self, system, poll_interval=30, timeout=3600, progress_callback=None):
+        """
+        Args:
+            system: instance of EC2System, default system to submit tasks to
+            poll_interval (int): seconds between polls of the pending tasks
+            timeout (int): seconds after which a pending task fails with ActionTimedOutError
+            progress_callback: called as ``progress_callback(task_id, status, progress)`` on
+                each poll of a pending task, progress is a percentage string or None
+        """
+        self.system = system
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.progress_callback = progress_callback
+        self.logger = system.logger
+        self._lock = threading.Lock()
+        # (kind, region) -> {task_id: (future, submitted_at)}
+        self._pending = {}
+        self._systems = {}
+        self._futures = []
+        self._thread = None
+
+    def _track(self, kind, system, task_id):
+        future = Future()
+        with self._lock:
+            self._systems[system.region] = system
+            self._pending.setdefault((kind, system.region), {})[task_id] = (future, time.time())
+            self._futures.append(future)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='ImageTaskTracker')
+                self._thread.daemon = True
+                self._thread.start()
+        return future
+
+    def submit_import(self, s3bucket, s3key, format="vhd", description=None, system=None):
+        """
+        Start importing an image from S3
+
+        Returns:
+            Future resolving to the AMI id of the imported image
+        """
+        system = system or self.system
+        task_id = system._start_image_import(s3bucket, s3key, format, description)
+        self.logger.info("Started import task '%s' of image %s/%s", task_id, s3bucket, s3key)
+        return self._track('import', system, task_id)
+
+    def submit_copy(self, source_region, source_image, name, system=None):
+        """
+        Start copying an image from ``source_region`` to the region of ``system``
+
+        Returns:
+            Future resolving to the AMI id of the image copy once it is available
+        """
+        system = system or self.system
+        image_id = system._start_image_copy(source_region, source_image, name)
+        self.logger.info("Started copy of image '%s' from %s to %s as '%s'",
+                         source_image, source_region, system.region, image_id)
+        return self._track('copy', system, image_id)
+
+    def _report(self, task_id, status, progress=None):
+        self.logger.info("Image task '%s': %s %s", task_id, status, progress or '')
+        if self.progress_callback:
+            try:
+                self.progress_callback(task_id, status, progress)
+            except Exception:
+                self.logger.exception("Progress callback of image task '%s' failed", task_id)
+
+    def _describe(self, kind, system, task_ids):
+        """Returns dict of task id -> (status, progress, AMI id, message) for known tasks"""
+        if kind == 'import':
+            response = _call_with_backoff(
+                system.ec2_connection.describe_import_image_tasks, ImportTaskIds=task_ids)
+            return {
+                task['ImportTaskId']: (
+                    task.get('Status'), task.get('Progress'), task.get('ImageId'),
+                    task.get('StatusMessage'))
+                for task in response['ImportImageTasks']}
+        # filter by image-id, as one unknown id in ImageIds would fail the whole call. A fresh
+        # copy may not be visible yet, it is just missing from the result until the next poll
+        states = {}
+        for chunk in _chunks(task_ids, MAX_FILTER_VALUES):
+            response = _call_with_backoff(
+                system.ec2_connection.describe_images,
+                Filters=[{'Name': 'image-id', 'Values': chunk}])
+            states.update({
+                image['ImageId']: (
+                    image.get('State'), None, image['ImageId'],
+                    image.get('StateReason', {}).get('Message'))
+                for image in response['Images']})
+        return states
+
+    def _resolve(self, kind, task_id, future, submitted_at, status, progress, image_id,
+                 message):
+        """Resolve the future of a task if it is done, returns whether it is"""
+        if future.cancelled():
+            return True
+        elif status in ('completed', 'available'):
+            self._report(task_id, status, '100')
+            future.set_result(image_id)
+        elif status in self.FAILED_IMPORT_STATES + self.FAILED_IMAGE_STATES:
+            self._report(task_id, status, progress)
+            future.set_exception(ImageTaskError(
+                "Image {} task '{}' ended as {}: {}".format(kind, task_id, status, message)))
+        elif self.timeout and time.time() - submitted_at > self.timeout:
+            future.set_exception(ActionTimedOutError(
+                "Image {} task '{}' still {} after {}s".format(
+                    kind, task_id, status, self.timeout)))
+        else:
+            self._report(task_id, status, progress)
+            return False
+        return True
+
+    def _poll(self):
+        with self._lock:
+            pending = {key: dict(tasks) for key, tasks in self._pending.items()}
+        done = []
+        for (kind, region), tasks in pending.items():
+            try:
+                states = self._describe(kind, self._systems[region], list(tasks))
+            except Exception:
+                self.logger.exception("Polling %s tasks in %s failed", kind, region)
+                continue
+            for task_id, (future, submitted_at) in tasks.items():
+                state = states.get(task_id, ('pending', None, None, None))
+                try:
+                    finished = self._resolve(kind, task_id, future, submitted_at, *state)
+                except Exception:
+                    # e.g. the caller cancelled the future after our cancelled() check
+                    self.logger.exception("Resolving image %s task '%s' failed", kind, task_id)
+                    finished = True
+                if finished:
+                    done.append((kind, region, task_id))
+        with self._lock:
+            for kind, region, task_id in done:
+                tasks = self._pending[(kind, region)]
+                del tasks[task_id]
+                if not tasks:
+                    del self._pending[(kind, region)]
+
+    def _run(self):
+        try:
+            while True:
+                time.sleep(self.poll_interval)
+                try:
+                    self._poll()
+                except Exception:
+                    self.logger.exception("Polling image tasks failed")
+                with self._lock:
+                    if not self._pending:
+                        self._thread = None
+                        return
+        finally:
+            # if this thread dies anyway, let the next submit start a new one
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def wait(self, timeout=None):
+        """
+        Block until all submitted tasks are done
+
+        Returns:
+            dict of futures 'done' and 'not_done', as returned by concurrent.futures.wait
+        """
+        with self._lock:
+            futures = list(self._futures)
+        done, not_done = wait(futures, timeout=timeout)
+        return {'done': done, 'not_done': not_done}
+
+
 class EC2System(System, VmMixin, TemplateMixin, StackMixin):
     """EC2 Management System, powered by boto
 
@@ -343,13 +927,18 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
     For the purposes of the EC2 system, a VM's instance ID is its name because
     EC2 instances don't have to have unique names.
 
+    Connections to the individual AWS services are only created when first used, and are
+    shared by all EC2System instances with the same credentials and region.
+
     Args:
         *kwargs: Arguments to connect, usually, username, password, region.
+            ``regions`` optionally limits the regions used by the *_all_regions methods,
+            by default all regions enabled for the account are used.
     Returns: A :py:class:`EC2System` object.
     """
 
     _stats_available = {
-        'num_vm': lambda self: len(self.list_vms(hide_deleted=False)),
+        'num_vm': lambda self: sum(1 for _ in self._iter_instances()),
         'num_template': lambda self: len(self.list_templates()),
     }
 
@@ -360,46 +949,96 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
         super(EC2System, self).__init__(**kwargs)
         self._username = kwargs.get('username')
         self._password = kwargs.get('password')
-        connection_config = Config(
+        self._region_name = kwargs.get('region')
+        self._region_systems = {self._region_name: self}
+        self._messaging_indexes = {}
+        self.kwargs = kwargs
+
+    @property
+    def _connection_config(self):
+        return Config(
             signature_version='s3v4',
             retries=dict(
                 max_attempts=10
             )
         )
 
-        self._region_name = kwargs.get('region')
-        self._region = get_region(self._region_name)
-        self.api = EC2Connection(self._username, self._password, region=self._region)
-
-        self.sqs_connection = connection.SQSConnection(
-            self._username, self._password, region=_regions(
-                regionmodule=sqs, regionname=self._region_name)
+    def _boto3_kwargs(self):
+        return dict(
+            aws_access_key_id=self._username, aws_secret_access_key=self._password,
+            region_name=self._region_name, config=self._connection_config
         )
 
-        self.elb_connection = ELBConnection(
-            self._username, self._password, region=_regions(
-                regionmodule=elb, regionname=self._region_name)
-        )
+    def _connection_key(self, kind, service):
+        return (kind, service, self._username, self._password, self._region_name)
+
+    def _client(self, service, **kwargs):
+        """Get a shared boto3 client, boto3 clients are thread safe"""
+        kwargs = kwargs or self._boto3_kwargs()
+        return _cached_connection(
+            self._connection_key('client', service),
+            lambda: boto3.client(service, **kwargs))
+
+    def _resource(self, service):
+        """Get a boto3 resource, shared per thread as boto3 resources are not thread safe"""
+        return _thread_resource(
+            self._connection_key('resource', service),
+            lambda: boto3.resource(service, **self._boto3_kwargs()))
+
+    @cached_property
+    def api(self):
+        return _cached_connection(
+            self._connection_key('boto', 'ec2'),
+            lambda: EC2Connection(
+                self._username, self._password, region=get_region(self._region_name)))
+
+    @cached_property
+    def sqs_connection(self):
+        return _cached_connection(
+            self._connection_key('boto', 'sqs'),
+            lambda: connection.SQSConnection(
+                self._username, self._password, region=_regions(
+                    regionmodule=sqs, regionname=self._region_name)))
+
+    @cached_property
+    def elb_connection(self):
+        return _cached_connection(
+            self._connection_key('boto', 'elb'),
+            lambda: ELBConnection(
+                self._username, self._password, region=_regions(
+                    regionmodule=elb, regionname=self._region_name)))
 
-        self.s3_connection = boto3.resource(
-            's3', aws_access_key_id=self._username, aws_secret_access_key=self._password,
-            region_name=self._region_name, config=connection_config
-        )
+    @property
+    def s3_connection(self):
+        return self._resource('s3')
 
-        self.ec2_connection = boto3.client(
-            'ec2', aws_access_key_id=self._username, aws_secret_access_key=self._password,
-            region_name=self._region_name, config=connection_config
-        )
+    @cached_property
+    def elb_client(self):
+        return self._client('elb')
 
-        self.cloudformation_connection = boto3.client(
-            'cloudformation', aws_access_key_id=self._username,
-            aws_secret_access_key=self._password, region_name=self._region_name,
-            config=connection_config
-        )
+    @cached_property
+    def s3_client(self):
+        return self._client('s3')
 
-        self.sns_connection = boto3.client('sns', region_name=self._region_name)
+    @cached_property
+    def ec2_connection(self):
+        return self._client('ec2')
 
-        self.kwargs = kwargs
+    @property
+    def ec2_resource(self):
+        return self._resource('ec2')
+
+    @cached_property
+    def cloudformation_connection(self):
+        return self._client('cloudformation')
+
+    @cached_property
+    def sns_connection(self):
+        return self._client('sns', region_name=self._region_name)
+
+    @cached_property
+    def sqs_client(self):
+        return self._client('sqs')
 
     @property
     def _identifying_attrs(self):
@@ -426,31 +1065,158 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
         """Returns the current versions of boto and the EC2 API being used"""
         return '%s %s' % (boto.UserAgent, self.api.APIVersion)
 
-    def _get_instances(self, **kwargs):
+    @property
+    def page_size(self):
+        return self.kwargs.get('page_size', DEFAULT_PAGE_SIZE)
+
+    @staticmethod
+    def _to_filters(filters):
+        """Convert a {name: value(s)} filters dict into the boto3 Filters list"""
+        if not isinstance(filters, dict):
+            return list(filters or [])
+        return [
+            {'Name': name, 'Values': values if isinstance(values, list) else [values]}
+            for name, values in filters.items()
+        ]
+
+    @property
+    def region(self):
+        return self._region_name
+
+    def list_regions(self):
         """
-        Gets instance reservations and parses instance objects
+        Returns names of the regions used by the *_all_regions methods
+
+        These are the regions in the ``regions`` kwarg, or else all regions enabled for the
+        account.
         """
-        reservations = self.api.get_all_instances(**kwargs)
-        instances = list()
-        for reservation in reservations:
-            for instance in reservation.instances:
-                instances.append(
-                    EC2Instance(system=self, raw=instance)
-                )
-        return instances
+        if self.kwargs.get('regions'):
+            return list(self.kwargs['regions'])
+        return sorted(
+            region['RegionName'] for region in self.ec2_connection.describe_regions()['Regions'])
+
+    def get_region_system(self, region):
+        """
+        Returns an EC2System with the same credentials, bound to ``region``
+
+        Systems are cached per region, and only create the connections they use.
+        """
+        if region not in self._region_systems:
+            kwargs = dict(self.kwargs, region=region)
+            self._region_systems[region] = EC2System(**kwargs)
+        return self._region_systems[region]
+
+    def _fan_out(self, func, regions=None, ignore_errors=False):
+        """
+        Call ``func(region_system)`` for each region concurrently
+
+        Args:
+            func: callable taking the EC2System of one region
+            regions (list): region names, defaults to ``self.list_regions()``
+            ignore_errors (bool): leave the regions which failed out of the results, instead
+                of raising the first error once all regions are done
+        Returns:
+            dict of region name -> result. Failed regions are logged either way.
+        """
+        regions = regions or self.list_regions()
+        systems = [self.get_region_system(region) for region in regions]
+        results = {}
+        if not systems:
+            return results
+        with ThreadPoolExecutor(max_workers=len(systems)) as executor:
+            futures = {
+                executor.submit(func, system): system.region for system in systems}
+            failed = []
+            for future, region in futures.items():
+                try:
+                    results[region] = future.result()
+                except Exception:
+                    self.logger.exception("Listing of region '%s' failed", region)
+                    failed.append(future)
+        if failed and not ignore_errors:
+            # raises the error of the failed region
+            failed[0].result()
+        return results
+
+    def list_vms_all_regions(self, hide_deleted=True, regions=None, ignore_errors=False):
+        """
+        Returns instances of all regions, listed concurrently
+
+        The ``system`` of each returned EC2Instance is the EC2System of its region, see
+        ``EC2System.region``. If a region fails, its error is raised unless ``ignore_errors``
+        is set, in which case the region is left out.
+        """
+        results = self._fan_out(
+            lambda system: system.list_vms(hide_deleted=hide_deleted), regions, ignore_errors)
+        return [vm for region in sorted(results) for vm in results[region]]
+
+    def list_templates_all_regions(self, regions=None, ignore_errors=False, **kwargs):
+        """
+        Returns images of all regions, listed concurrently. kwargs go to ``list_templates``
+
+        The ``system`` of each returned EC2Image is the EC2System of its region. See
+        ``list_vms_all_regions`` for ``ignore_errors``.
+        """
+        results = self._fan_out(
+            lambda system: system.list_templates(**kwargs), regions, ignore_errors)
+        return [image for region in sorted(results) for image in results[region]]
+
+    def list_stacks_all_regions(self, stack_status_filter=StackStates.ACTIVE, regions=None,
+                                ignore_errors=False):
+        """
+        Returns stacks of all regions, listed concurrently
+
+        The ``system`` of each returned CloudFormationStack is the EC2System of its region. See
+        ``list_vms_all_regions`` for ``ignore_errors``.
+        """
+        results = self._fan_out(
+            lambda system: system.list_stacks(stack_status_filter=stack_status_filter), regions,
+            ignore_errors)
+        return [stack for region in sorted(results) for stack in results[region]]
+
+    def _iter_instances(self, filters=None, instance_ids=None, page_size=None):
+        """
+        Generates EC2Instance objects, one describe_instances page at a time
+
+        Args:
+            filters (list): boto3 Filters, evaluated server side
+            instance_ids (list): ids of the instances to describe
+            page_size (int): MaxResults per page, defaults to ``self.page_size``. EC2 does not
+                allow it together with ``instance_ids``
+        """
+        kwargs = {}
+        if filters:
+            kwargs['Filters'] = filters
+        if instance_ids:
+            kwargs['InstanceIds'] = instance_ids
+        else:
+            kwargs['PaginationConfig'] = {'PageSize': page_size or self.page_size}
+
+        paginator = self.ec2_connection.get_paginator('describe_instances')
+        try:
+            for page in paginator.paginate(**kwargs):
+                for reservation in page['Reservations']:
+                    for instance_data in reservation['Instances']:
+                        # Build the resource from the page data, so it doesn't reload itself
+                        instance = self.ec2_resource.Instance(instance_data['InstanceId'])
+                        instance.meta.data = instance_data
+                        yield EC2Instance(system=self, raw=instance)
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('InvalidInstanceID.NotFound',
+                                                   'InvalidInstanceID.Malformed'):
+                return
+            raise
 
     @staticmethod
     def _add_filter_for_terminated(kwargs_dict):
         new_filter = {
-            'instance-state-name': [
+            'Name': 'instance-state-name',
+            'Values': [
                 api_state for api_state, vm_state in EC2Instance.state_map.items()
                 if vm_state is not VmState.DELETED
             ]
         }
-        if 'filters' not in kwargs_dict:
-            kwargs_dict['filters'] = new_filter
-        else:
-            kwargs_dict['filters'].update(new_filter)
+        kwargs_dict.setdefault('filters', []).append(new_filter)
         return kwargs_dict
 
     def find_vms(self, name=None, id=None, filters=None, hide_deleted=True):
@@ -464,7 +1230,8 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
         Args:
             name (str): name of instance (which is a tag)
             id (str): id of instance
-            filters (dict): filters to pass along to system.api.get_all_instances()
+            filters (dict): filters to pass along to describe_instances, as a dict of
+                {name: value(s)} or a list of boto3 filter dicts
             hide_deleted: do not list an instance if it has been terminated
 
         Returns:
@@ -479,7 +1246,7 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
         if id:
             kwargs = {'instance_ids': [id]}
         elif filters:
-            kwargs = {'filters': filters}
+            kwargs = {'filters': self._to_filters(filters)}
         elif name:
             # Quick validation that the instance name isn't actually an ID
             pattern = re.compile(r'^i-\w{8,17}$')
@@ -487,14 +1254,12 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
                 # Switch to using the id search method
                 kwargs = {'instance_ids': [name]}
             else:
-                kwargs = {'filters': {'tag:Name': name}}
+                kwargs = {'filters': self._to_filters({'tag:Name': name})}
 
         if hide_deleted:
             self._add_filter_for_terminated(kwargs)
 
-        instances = self._get_instances(**kwargs)
-
-        return instances
+        return list(self._iter_instances(**kwargs))
 
     def get_vm(self, name, hide_deleted=True):
         """
@@ -524,7 +1289,78 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
         kwargs = {}
         if hide_deleted:
             self._add_filter_for_terminated(kwargs)
-        return [inst for inst in self._get_instances(**kwargs)]
+        return list(self._iter_instances(**kwargs))
+
+    def _bulk_instance_action(self, action, waiter_name, vms, timeout, delay=15):
+        """
+        Run ``action`` for many instances and wait until all of them are done
+
+        Each batch of up to 1000 instances is changed with one API call, and then tracked with
+        the boto3 ``waiter_name`` waiter, which polls the whole batch per describe_instances.
+
+        Args:
+            action (string): name of the EC2.Client method, e.g. 'start_instances'
+            waiter_name (string): name of the EC2.Client waiter, e.g. 'instance_running'
+            vms (list): instance ids or EC2Instance objects
+            timeout: seconds to wait for each batch
+            delay: seconds between polls
+        Returns:
+            True if all instances reached the desired state
+            False if otherwise, or waiting timed out
+        """
+        instance_ids = [getattr(vm, 'uuid', vm) for vm in vms]
+        batches = _chunks(instance_ids, MAX_BATCH_SIZE)
+        self.logger.info("%s for %d EC2 instances", action, len(instance_ids))
+        for batch in batches:
+            getattr(self.ec2_connection, action)(InstanceIds=batch)
+
+        waiter = self.ec2_connection.get_waiter(waiter_name)
+        success = True
+        for batch in batches:
+            try:
+                waiter.wait(InstanceIds=batch, WaiterConfig={
+                    'Delay': delay, 'MaxAttempts': max(1, int(timeout // delay))})
+            except WaiterError:
+                self.logger.exception("Waiting for %s of instances %s failed", waiter_name, batch)
+                success = False
+        return success
+
+    def start_vms(self, vms, timeout=600):
+        """
+        Start many instances, and wait for them to be 'running'
+
+        Args:
+            vms (list): instance ids or EC2Instance objects
+        Returns:
+            True if successful
+            False if otherwise, or action timed out
+        """
+        return self._bulk_instance_action('start_instances', 'instance_running', vms, timeout)
+
+    def stop_vms(self, vms, timeout=600):
+        """
+        Stop many instances, and wait for them to be 'stopped'
+
+        Args:
+            vms (list): instance ids or EC2Instance objects
+        Returns:
+            True if successful
+            False if otherwise, or action timed out
+        """
+        return self._bulk_instance_action('stop_instances', 'instance_stopped', vms, timeout)
+
+    def terminate_vms(self, vms, timeout=600):
+        """
+        Terminate many instances, and wait for them to be 'terminated'
+
+        Args:
+            vms (list): instance ids or EC2Instance objects
+        Returns:
+            True if successful
+            False if otherwise, or action timed out
+        """
+        return self._bulk_instance_action(
+            'terminate_instances', 'instance_terminated', vms, timeout)
 
     def create_vm(self, image_id, min_count=1, max_count=1, instance_type='t1.micro',
                   vm_name='', **kwargs):
@@ -586,23 +1422,91 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
         else:
             return instances
 
+    @staticmethod
+    def _flatten_status_filter(stack_status_filter):
+        """Flatten a status filter, as the StackStates constants may be nested in a tuple"""
+        statuses = []
+        for status in stack_status_filter or []:
+            if isinstance(status, (list, tuple)):
+                statuses.extend(status)
+            else:
+                statuses.append(status)
+        return statuses
+
+    def iter_stack_summaries(self, stack_status_filter=None):
+        """
+        Generates the summaries of all stacks, one list_stacks page at a time
+
+        Args:
+            stack_status_filter: list of stack statuses to filter for server side.
+                See ``StackStates``
+        """
+        kwargs = {}
+        statuses = self._flatten_status_filter(stack_status_filter)
+        if statuses:
+            kwargs['StackStatusFilter'] = statuses
+        return _paginate(
+            self.cloudformation_connection, 'list_stacks', 'StackSummaries', **kwargs)
+
+    def _get_stack_index(self, force=False):
+        """
+        Returns the index of all live stacks, loaded with one paginated describe_stacks
+
+        The index is kept for ``stack_cache_ttl`` seconds (default 60), and is a dict with
+        'by_id' (stack id -> describe_stacks data) and 'by_name' (name -> list of stack ids)
+        """
+        index = getattr(self, '_stack_index', None)
+        ttl = self.kwargs.get('stack_cache_ttl', 60)
+        if force or index is None or time.time() - index['loaded_at'] > ttl:
+            index = {'loaded_at': time.time(), 'by_id': {}, 'by_name': {}}
+            for stack in _paginate(self.cloudformation_connection, 'describe_stacks', 'Stacks'):
+                index['by_id'][stack['StackId']] = stack
+                index['by_name'].setdefault(stack['StackName'], []).append(stack['StackId'])
+            self._stack_index = index
+        return index
+
+    def _forget_stack(self, stack_id):
+        """Drop a stack from the stack index, e.g. after deleting it"""
+        index = getattr(self, '_stack_index', None)
+        if index is None:
+            return
+        stack = index['by_id'].pop(stack_id, None)
+        if stack:
+            stack_ids = index['by_name'].get(stack['StackName'], [])
+            if stack_id in stack_ids:
+                stack_ids.remove(stack_id)
+            if not stack_ids:
+                index['by_name'].pop(stack['StackName'], None)
+
+    def refresh_stacks(self, stacks=None):
+        """
+        Reload the stack index, and update the raw data of ``stacks`` from it
+
+        This refreshes many CloudFormationStack objects with one paginated describe_stacks,
+        instead of one describe_stacks call per stack.
+        """
+        self._get_stack_index(force=True)
+        for stack in stacks or []:
+            stack.refresh(from_index=True)
+
     def list_stacks(self, stack_status_filter=StackStates.ACTIVE):
         """
         Returns a list of Stack objects
 
         stack_status_filter:  list of stack statuses to filter for. See ``StackStates``
         """
-        stack_list = [
-            CloudFormationStack(system=self, uuid=stack_summary['StackId'])
-            for stack_summary in self.cloudformation_connection.list_stacks()['StackSummaries']
-            if stack_summary['StackStatus'] in stack_status_filter
+        return [
+            CloudFormationStack(system=self, uuid=stack_summary['StackId'], raw=stack_summary)
+            for stack_summary in self.iter_stack_summaries(stack_status_filter)
         ]
-        return stack_list
 
     def find_stacks(self, name=None, id=None):
         """
         Return list of all stacks with given name or id
 
+        Live stacks are looked up by name or id in the stack index (see
+        ``refresh_stacks``), falling back to describe_stacks when missing from it.
+
         According to boto3 docs, you can use name or ID in these situations:
 
         "Running stacks: You can specify either the stack's name or its unique stack ID.
@@ -630,6 +1534,17 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
             searching_by_name = False
             name_or_id = id
 
+        index = self._get_stack_index()
+        if name_or_id in index['by_id']:
+            stack_ids = [name_or_id]
+        else:
+            stack_ids = index['by_name'].get(name_or_id, [])
+        if stack_ids:
+            return [
+                CloudFormationStack(system=self, uuid=stack_id, raw=index['by_id'][stack_id])
+                for stack_id in stack_ids
+            ]
+
         stack_list = []
         try:
             # Try to find by name/id directly by using describe_stacks
@@ -642,9 +1557,9 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
             # Stack not found, if searching by name, look through deleted stacks...
             if searching_by_name and 'Stack with id {} does not exist'.format(name) in str(error):
                 stack_list = [
-                    CloudFormationStack(system=self, uuid=stack_summary['StackId'])
-                    for stack_summary
-                    in self.cloudformation_connection.list_stacks()['StackSummaries']
+                    CloudFormationStack(
+                        system=self, uuid=stack_summary['StackId'], raw=stack_summary)
+                    for stack_summary in self.iter_stack_summaries()
                     if stack_summary['StackName'] == name
                 ]
         return stack_list
@@ -665,28 +1580,49 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
             raise MultipleItemsError("Multiple stacks with name {} found".format(name))
         return stacks[0]
 
+    @cached_property
+    def image_catalogue(self):
+        """EC2ImageCatalogue caching the images of this region"""
+        return EC2ImageCatalogue(self, ttl=self.kwargs.get('image_cache_ttl', 300))
+
+    @staticmethod
+    def _image_scope(executable_by_me=True, owned_only_by_me=False, public=False):
+        if public:
+            return 'public'
+        elif executable_by_me:
+            return 'executable'
+        elif owned_only_by_me:
+            return 'owned'
+        raise ValueError(
+            "One of the following must be 'True': owned_by_me, executable_by_me, public")
+
+    def _image_resource(self, image_data):
+        """Build an EC2.Image resource from describe_images data, without reloading it"""
+        image = self.ec2_resource.Image(image_data['ImageId'])
+        image.meta.data = image_data
+        return image
+
+    def refresh_templates(self):
+        """Drop cached images, e.g. to list freshly registered images"""
+        self.image_catalogue.refresh()
+
     def list_templates(self, executable_by_me=True, owned_only_by_me=False, public=False):
         """
         List images on ec2 of image-type 'machine'
 
+        Images are served from ``image_catalogue``, see ``refresh_templates``.
+
         Args:
             executable_by_me: search images executable by me (default True)
             owned_only_by_me: search images owned only by me (default False)
             public: search public images (default False)
         """
-        img_filter = {'image-type': 'machine'}
-
-        if public:
-            images = self.api.get_all_images(filters=img_filter)
-        elif executable_by_me:
-            images = self.api.get_all_images(executable_by=['self'], filters=img_filter)
-        elif owned_only_by_me:
-            images = self.api.get_all_images(owners=['self'], filters=img_filter)
-        else:
-            raise ValueError(
-                "One of the following must be 'True': owned_by_me, executable_by_me, public")
-
-        return [EC2Image(system=self, raw=image) for image in images]
+        scope = self._image_scope(executable_by_me, owned_only_by_me, public)
+        return [
+            EC2Image(system=self, raw=self._image_resource(image))
+            for image in self.image_catalogue.images(scope)
+            if image.get('ImageType') == 'machine'
+        ]
 
     def find_templates(self, name=None, id=None, executable_by_me=True, owned_only_by_me=False,
                        public=False, filters=None):
@@ -695,7 +1631,8 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
 
         Supported queries include searching by name, id, or passing
         in a specific filters dict to the system API. You can only
-        select one of these methods.
+        select one of these methods. Searches by name or id are served from
+        ``image_catalogue``, searches by filters always query the API.
 
         Args:
             name (str): name of image
@@ -703,7 +1640,8 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
             executable_by_me: search images executable by me (default True)
             owned_only_by_me: search images owned only by me (default False)
             public: search public images (default False)
-            filters (dict): optional filters to pass along to system.api.get_all_images()
+            filters (dict): optional filters to pass along to describe_images, as a dict of
+                {name: value(s)} or a list of boto3 filter dicts
 
         Returns:
             List of EC2Image objects that match
@@ -714,29 +1652,21 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
             raise ValueError(
                 "You must select one of these search methods: name, id, or filters")
 
+        scope = self._image_scope(executable_by_me, owned_only_by_me, public)
         if id:
-            kwargs = {'image_ids': [id]}
+            images = self.image_catalogue.find(scope, image_id=id)
         elif filters:
-            kwargs = {'filters': filters}
+            images = self.image_catalogue.describe_images(
+                scope, Filters=self._to_filters(filters))
         elif name:
             # Quick validation that the image name isn't actually an ID
             if name.startswith('ami-'):
                 # Switch to using the id search method
-                kwargs = {'image_ids': [name]}
+                images = self.image_catalogue.find(scope, image_id=name)
             else:
-                kwargs = {'filters': {'name': name}}
+                images = self.image_catalogue.find(scope, name=name)
 
-        if public:
-            images = self.api.get_all_images(**kwargs)
-        elif executable_by_me:
-            images = self.api.get_all_images(executable_by=['self'], **kwargs)
-        elif owned_only_by_me:
-            images = self.api.get_all_images(owners=['self'], **kwargs)
-        else:
-            raise ValueError(
-                "One of the following must be 'True': owned_by_me, executable_by_me, public")
-
-        return [EC2Image(system=self, raw=image) for image in images]
+        return [EC2Image(system=self, raw=self._image_resource(image)) for image in images]
 
     def get_template(self, name_or_id):
         matches = self.find_templates(name=name_or_id)
@@ -764,31 +1694,155 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
             self.logger.exception("Error: Bucket was not successfully created.")
             return False
 
-    def upload_file_to_s3_bucket(self, bucket_name, file_path, file_name):
-        bucket = self.s3_connection.Bucket(bucket_name)
+    @staticmethod
+    def _transfer_config(chunk_size=None, max_concurrency=None):
+        chunk_size = chunk_size or S3_CHUNK_SIZE
+        return TransferConfig(
+            multipart_threshold=chunk_size, multipart_chunksize=chunk_size,
+            max_concurrency=max_concurrency or S3_MAX_CONCURRENCY)
+
+    def _object_matches_file(self, bucket_name, object_key, file_path, chunk_size):
+        """
+        Check if an object has the same size and content as a local file
+
+        The content is compared by the md5 stored in the object metadata by
+        ``upload_file_to_s3_bucket``, or else by the ETag.
+
+        Returns:
+            (bool, md5 hexdigest of the file)
+        """
+        md5, etag = _file_checksums(file_path, chunk_size)
+        try:
+            head = self.s3_client.head_object(Bucket=bucket_name, Key=object_key)
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False, md5
+            raise
+        if head['ContentLength'] != os.path.getsize(file_path):
+            return False, md5
+        if head.get('Metadata', {}).get('md5'):
+            return head['Metadata']['md5'] == md5, md5
+        return head['ETag'].strip('"') == etag, md5
+
+    def upload_file_to_s3_bucket(self, bucket_name, file_path, file_name, chunk_size=None,
+                                 max_concurrency=None, progress_callback=None,
+                                 skip_if_exists=False):
+        """
+        Upload a file, in parts uploaded in parallel when it is bigger than ``chunk_size``
+
+        Args:
+            bucket_name: name of the bucket
+            file_path: path of the local file
+            file_name: key of the object to create
+            chunk_size (int): multipart chunk size in bytes, defaults to 64MB
+            max_concurrency (int): number of parts uploaded in parallel, defaults to 10
+            progress_callback: called with the number of bytes transferred since last call
+            skip_if_exists (bool): don't upload if an object with the same size and content
+                checksum already exists
+        Returns:
+            True if the file was uploaded, or skipped as it was already there
+            False if the upload failed
+        """
         self.logger.info("uploading file '%s' to bucket: '%s'", file_path, bucket_name)
-        if os.path.isfile(file_path):
-            try:
-                bucket.upload_file(file_path, file_name)
-                self.logger.info("Success: uploading file completed")
-                return True
-            except Exception:
-                self.logger.exception("File upload failed.")
-                return False
-        else:
+        if not os.path.isfile(file_path):
             self.logger.error("Error: File to upload does not exist.")
             return False
+        chunk_size = chunk_size or S3_CHUNK_SIZE
+        try:
+            extra_args = None
+            if skip_if_exists:
+                matches, md5 = self._object_matches_file(
+                    bucket_name, file_name, file_path, chunk_size)
+                if matches:
+                    self.logger.info("Skipped: identical object '%s' already exists", file_name)
+                    return True
+                # store the checksum, so it can be compared regardless of chunk size
+                extra_args = {'Metadata': {'md5': md5}}
+            self.s3_client.upload_file(
+                file_path, bucket_name, file_name, ExtraArgs=extra_args,
+                Callback=progress_callback,
+                Config=self._transfer_config(chunk_size, max_concurrency))
+            self.logger.info("Success: uploading file completed")
+            return True
+        except Exception:
+            self.logger.exception("File upload failed.")
+            return False
+
+    def download_file_from_s3_bucket(self, bucket_name, object_key, file_path, chunk_size=None,
+                                     max_concurrency=None, progress_callback=None):
+        """
+        Download an object, in ranges downloaded in parallel when it is bigger than
+        ``chunk_size``
+
+        Args:
+            bucket_name: name of the bucket
+            object_key: key of the object to download
+            file_path: path of the local file to write
+            chunk_size (int): size of each ranged GET in bytes, defaults to 64MB
+            max_concurrency (int): number of ranges downloaded in parallel, defaults to 10
+            progress_callback: called with the number of bytes transferred since last call
+        Returns:
+            True if successful, False otherwise
+        """
+        self.logger.info("downloading object '%s' from bucket: '%s'", object_key, bucket_name)
+        try:
+            self.s3_client.download_file(
+                bucket_name, object_key, file_path, Callback=progress_callback,
+                Config=self._transfer_config(chunk_size, max_concurrency))
+            self.logger.info("Success: downloading file completed")
+            return True
+        except Exception:
+            self.logger.exception("File download failed.")
+            return False
 
     def object_exists_in_bucket(self, bucket_name, object_key):
-        bucket = self.s3_connection.Bucket(name=bucket_name)
-        objects = [o for o in bucket.objects.all() if o.key == object_key]
-        return any(objects)
+        """Check if the object exists, with a single HEAD request"""
+        try:
+            self.s3_client.head_object(Bucket=bucket_name, Key=object_key)
+            return True
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
 
-    def delete_s3_bucket(self, bucket_name):
-        """TODO: Force delete - delete all objects and then bucket"""
+    def iter_bucket_objects(self, bucket_name, prefix='', page_size=None):
+        """
+        Generates the objects of a bucket, one list_objects_v2 page at a time
+
+        Args:
+            bucket_name: name of the bucket
+            prefix: only list keys starting with this prefix
+            page_size (int): MaxKeys per page, defaults to ``self.page_size``
+        Yields:
+            dicts with 'Key', 'Size', 'ETag' and 'LastModified' of each object
+        """
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(
+            Bucket=bucket_name, Prefix=prefix,
+            PaginationConfig={'PageSize': page_size or self.page_size})
+        for page in pages:
+            for obj in page.get('Contents', []):
+                yield obj
+
+    def delete_s3_bucket(self, bucket_name, force=False):
+        """
+        Delete a bucket
+
+        Args:
+            bucket_name: name of the bucket
+            force (bool): first delete all objects (and object versions) in the bucket,
+                a bucket must be empty to be deleted
+        """
         bucket = self.s3_connection.Bucket(bucket_name)
         self.logger.info("Trying to delete bucket '%s'", bucket_name)
         try:
+            if force:
+                result = self.delete_s3_objects(bucket_name, prefix='', all_versions=True)
+                if result['errors']:
+                    self.logger.error(
+                        "Bucket '%s' could not be emptied, failed keys: %s",
+                        bucket_name, result['errors'])
+                    return False
             bucket.delete()
             self.logger.info("Success: bucket '%s' was deleted.", bucket_name)
             return True
@@ -796,19 +1850,98 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
             self.logger.exception("Bucket '%s' deletion failed", bucket_name)
             return False
 
+    def _iter_bucket_object_versions(self, bucket_name, prefix=''):
+        """Generates {'Key', 'VersionId'} of all object versions and delete markers"""
+        paginator = self.s3_client.get_paginator('list_object_versions')
+        pages = paginator.paginate(
+            Bucket=bucket_name, Prefix=prefix, PaginationConfig={'PageSize': self.page_size})
+        for page in pages:
+            for version in page.get('Versions', []) + page.get('DeleteMarkers', []):
+                yield {'Key': version['Key'], 'VersionId': version['VersionId']}
+
+    def delete_s3_objects(self, bucket_name, object_keys=None, prefix=None, all_versions=False,
+                          max_concurrency=S3_MAX_CONCURRENCY):
+        """
+        Delete many objects from a bucket, in concurrent delete_objects calls of 1000 keys
+
+        Keys are streamed from the given list or from a prefix listing, so the whole listing
+        never needs to be held in memory.
+
+        Args:
+            bucket_name: name of the bucket
+            object_keys (list): keys to delete, if not given keys are listed by ``prefix``
+            prefix: delete all objects whose key starts with this prefix ('' for all)
+            all_versions (bool): when listing by prefix, delete all versions and delete markers
+                of the objects, as needed to empty a versioned bucket
+            max_concurrency (int): number of delete_objects calls running in parallel
+        Returns:
+            dict with the number of 'deleted' objects and the 'errors' as a dict of
+            key -> error message
+        """
+        if object_keys is not None:
+            objects = ({'Key': key} for key in object_keys)
+        elif prefix is None:
+            raise ValueError("one of object_keys or prefix is required")
+        elif all_versions:
+            objects = self._iter_bucket_object_versions(bucket_name, prefix)
+        else:
+            objects = ({'Key': obj['Key']} for obj in self.iter_bucket_objects(bucket_name, prefix))
+
+        result = {'deleted': 0, 'errors': {}}
+
+        def _delete(batch):
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=bucket_name, Delete={'Objects': batch, 'Quiet': True})
+                errors = {error['Key']: error.get('Message', error.get('Code'))
+                          for error in response.get('Errors', [])}
+            except Exception as error:
+                errors = {obj['Key']: str(error) for obj in batch}
+            return len(batch) - len(errors), errors
+
+        def _collect(futures):
+            for future in futures:
+                deleted, errors = future.result()
+                result['deleted'] += deleted
+                result['errors'].update(errors)
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            pending = set()
+            batch = []
+            for obj in objects:
+                batch.append(obj)
+                if len(batch) < MAX_BATCH_SIZE:
+                    continue
+                pending.add(executor.submit(_delete, batch))
+                batch = []
+                # bound the number of batches held in memory
+                if len(pending) >= max_concurrency * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    _collect(done)
+            if batch:
+                pending.add(executor.submit(_delete, batch))
+            _collect(wait(pending).done)
+
+        for key, message in result['errors'].items():
+            self.logger.error("Deleting object '%s' from bucket '%s' failed: %s",
+                              key, bucket_name, message)
+        return result
+
     def delete_objects_from_s3_bucket(self, bucket_name, object_keys):
         """Delete each of the given object_keys from the given bucket"""
         if not isinstance(object_keys, list):
             raise ValueError("object_keys argument must be a list of key strings")
-        bucket = self.s3_connection.Bucket(name=bucket_name)
-        try:
-            bucket.delete_objects(
-                Delete={'Objects': [{'Key': object_key} for object_key in object_keys]})
-            return True
-        except Exception:
-            self.logger.exception(
-                "Deleting object keys %s from Bucket '%s' failed", object_keys, bucket_name)
-            return False
+        result = self.delete_s3_objects(bucket_name, object_keys=object_keys)
+        return not result['errors']
+
+    def sweep_orphans(self, categories=None, dry_run=True, max_concurrency=10):
+        """
+        Find and delete orphaned addresses, volumes, load balancers and network interfaces
+
+        See ``EC2OrphanSweeper.sweep``
+        """
+        sweeper = EC2OrphanSweeper(self, max_concurrency=max_concurrency)
+        return sweeper.sweep(categories=categories, dry_run=dry_run)
 
     def get_all_disassociated_addresses(self):
         return [
@@ -838,18 +1971,96 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
         return [volume for volume in self.api.get_all_volumes() if not
                 volume.attach_data.status]
 
+    def _get_messaging_index(self, kind, force=False):
+        """
+        Returns the cached name -> ARN index of SNS topics, or name -> URL index of SQS queues
+
+        The indexes are loaded with paginated listings and kept for ``messaging_cache_ttl``
+        seconds (default 60).
+
+        Args:
+            kind: 'topics' or 'queues'
+            force (bool): reload the index even if it has not expired
+        """
+        index = self._messaging_indexes.get(kind)
+        ttl = self.kwargs.get('messaging_cache_ttl', 60)
+        if force or index is None or time.time() - index['loaded_at'] > ttl:
+            if kind == 'topics':
+                # There is no way to get topic_name, so it
+                # has to be parsed from ARN, which looks
+                # like this: arn:aws:sns:sa-east-1:ACCOUNT_NUM:AWSConfig_topic
+                items = {
+                    topic['TopicArn'].split(':')[-1]: topic['TopicArn']
+                    for topic in _paginate(self.sns_connection, 'list_topics', 'Topics')}
+            else:
+                # queue URLs look like this: https://queue.amazonaws.com/ACCOUNT_NUM/queue_name
+                items = {
+                    url.rstrip('/').split('/')[-1]: url
+                    for url in _paginate(self.sqs_client, 'list_queues', 'QueueUrls')}
+            index = {'loaded_at': time.time(), 'items': items}
+            self._messaging_indexes[kind] = index
+        return index['items']
+
+    def _forget_messaging_item(self, kind, name):
+        index = self._messaging_indexes.get(kind)
+        if index:
+            index['items'].pop(name, None)
+
+    def _bulk_delete(self, delete, names, max_concurrency=10):
+        """Call ``delete(name)`` for all names concurrently, returns dict of name -> result"""
+        if not names:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(names))) as executor:
+            futures = {name: executor.submit(delete, name) for name in names}
+            return {name: future.result() for name, future in futures.items()}
+
+    def get_queue_url(self, queue_name, force_refresh=False):
+        """
+        Returns the URL of the SQS queue with this name, or None
+
+        Served from the queue index. Queues missing from it, as they were created after it was
+        loaded or list_queues left them out (it returns at most 1000 queues), are looked up
+        with get_queue_url and added to it.
+        """
+        queues = self._get_messaging_index('queues', force=force_refresh)
+        queue_url = queues.get(queue_name)
+        if queue_url is None:
+            try:
+                queue_url = self.sqs_client.get_queue_url(QueueName=queue_name)['QueueUrl']
+            except ClientError as error:
+                if error.response['Error']['Code'] != 'AWS.SimpleQueueService.NonExistentQueue':
+                    raise
+                return None
+            queues[queue_name] = queue_url
+        return queue_url
+
+    def list_queues(self, force_refresh=False):
+        """Returns the names of all SQS queues, at most 1000 as list_queues is not paginated"""
+        return list(self._get_messaging_index('queues', force=force_refresh))
+
     def delete_sqs_queue(self, queue_name):
         self.logger.info(" Deleting SQS queue '%s'", queue_name)
+        queue_url = self.get_queue_url(queue_name)
+        if not queue_url:
+            return False
         try:
-            queue = self.sqs_connection.get_queue(queue_name=queue_name)
-            if queue:
-                self.sqs_connection.delete_queue(queue=queue)
-                return True
-            else:
-                return False
-
-        except ActionTimedOutError:
+            _call_with_backoff(self.sqs_client.delete_queue, QueueUrl=queue_url)
+        except ClientError:
+            self.logger.exception("Delete of queue '%s' failed.", queue_name)
             return False
+        self._forget_messaging_item('queues', queue_name)
+        return True
+
+    def delete_sqs_queues(self, queue_names, max_concurrency=10):
+        """
+        Delete many SQS queues, looking up their URLs in the queue index
+
+        Returns:
+            dict of queue name -> True if deleted, False if missing or the delete failed
+        """
+        # load the index once, instead of in each worker thread
+        self._get_messaging_index('queues')
+        return self._bulk_delete(self.delete_sqs_queue, queue_names, max_concurrency)
 
     def get_all_unused_loadbalancers(self):
         return [
@@ -869,43 +2080,62 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
     def get_all_unused_network_interfaces(self):
         return [eni for eni in self.api.get_all_network_interfaces() if eni.status == "available"]
 
+    def _start_image_import(self, s3bucket, s3key, format="vhd", description=None):
+        result = _call_with_backoff(self.ec2_connection.import_image, DiskContainers=[
+            {
+                'Description': description if description is not None else s3key,
+                'Format': format,
+                'UserBucket': {
+                    'S3Bucket': s3bucket,
+                    'S3Key': s3key
+                }
+            }
+        ])
+        return result.get("ImportTaskId")
+
     def import_image(self, s3bucket, s3key, format="vhd", description=None):
         self.logger.info(
             " Importing image %s from %s bucket with description %s in %s started successfully.",
             s3key, s3bucket, description, format
         )
         try:
-            result = self.ec2_connection.import_image(DiskContainers=[
-                {
-                    'Description': description if description is not None else s3key,
-                    'Format': format,
-                    'UserBucket': {
-                        'S3Bucket': s3bucket,
-                        'S3Key': s3key
-                    }
-                }
-            ])
-            task_id = result.get("ImportTaskId")
-            return task_id
+            return self._start_image_import(s3bucket, s3key, format, description)
 
         except Exception:
             self.logger.exception("Import of image '%s' failed.", s3key)
             return False
 
+    def _start_image_copy(self, source_region, source_image, name):
+        result = _call_with_backoff(
+            self.ec2_connection.copy_image,
+            SourceRegion=source_region, SourceImageId=source_image, Name=name)
+        return result['ImageId']
+
     def copy_image(self, source_region, source_image, image_id):
         self.logger.info(
             " Copying image %s from region %s to region %s with image id %s",
-            source_image, source_region, self.kwargs.get('region'), image_id
+            source_image, source_region, self.region, image_id
         )
         try:
-            copy_image = self.ec2_connection.copy_image(
-                SourceRegion=source_region, SourceImageId=source_image, Name=image_id)
-            return copy_image.image_id
+            return self._start_image_copy(source_region, source_image, image_id)
 
         except Exception:
             self.logger.exception("Copy of image '%s' failed.", source_image)
             return False
 
+    def image_task_tracker(self, poll_interval=30, timeout=3600, progress_callback=None):
+        """
+        Returns an ImageTaskTracker to run many image imports and copies concurrently
+
+        Usage:
+            tracker = system.image_task_tracker()
+            futures = [tracker.submit_copy('us-east-1', ami, name, system=region_system)
+                       for region_system in region_systems]
+            image_ids = [future.result() for future in futures]
+        """
+        return ImageTaskTracker(self, poll_interval=poll_interval, timeout=timeout,
+                                progress_callback=progress_callback)
+
     def get_import_image_task(self, task_id):
         result = self.ec2_connection.describe_import_image_tasks(ImportTaskIds=[task_id])
         result_task = result.get("ImportImageTasks")
@@ -919,35 +2149,100 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
         else:
             return False
 
-    def list_topics(self):
-        return self.sns_connection.list_topics()
-
-    def get_arn_if_topic_exists(self, topic_name):
-        topics = self.list_topics()
+    def list_topics(self, force_refresh=False):
+        """Returns all SNS topics, in the shape of the boto3 list_topics response"""
+        return {
+            'Topics': [
+                {'TopicArn': arn}
+                for arn in self._get_messaging_index('topics', force=force_refresh).values()]
+        }
 
-        # There is no way to get topic_name, so it
-        # has to be parsed from ARN, which looks
-        # like this: arn:aws:sns:sa-east-1:ACCOUNT_NUM:AWSConfig_topic
-
-        topic_found = [
-            t.get('TopicArn')
-            for t in topics.get('Topics')
-            if t.get('TopicArn').split(':')[-1] == topic_name
-        ]
-        if topic_found:
-            return topic_found[0]
-        else:
-            return False
+    def get_arn_if_topic_exists(self, topic_name, force_refresh=False):
+        topics = self._get_messaging_index('topics', force=force_refresh)
+        if topic_name not in topics and not force_refresh:
+            # the topic may have been created after the index was loaded
+            topics = self._get_messaging_index('topics', force=True)
+        return topics.get(topic_name, False)
 
     def delete_topic(self, arn):
         self.logger.info(" Deleting SNS Topic '%s'", arn)
         try:
-            self.sns_connection.delete_topic(TopicArn=arn)
-            return True
-
+            _call_with_backoff(self.sns_connection.delete_topic, TopicArn=arn)
         except Exception:
             self.logger.exception("Delete of topic '%s' failed.", arn)
             return False
+        self._forget_messaging_item('topics', arn.split(':')[-1])
+        return True
+
+    def delete_topics(self, topic_names, max_concurrency=10):
+        """
+        Delete many SNS topics, looking up their ARNs in the topic index
+
+        Returns:
+            dict of topic name -> True if deleted, False if missing or the delete failed
+        """
+        # load the index once, fresh, so the workers don't reload it on each missing name
+        topics = self._get_messaging_index('topics', force=True)
+
+        def _delete(topic_name):
+            arn = topics.get(topic_name)
+            return self.delete_topic(arn) if arn else False
+        return self._bulk_delete(_delete, topic_names, max_concurrency)
+
+    def _find_existing(self, operation, result_key, id_key, id_filter, ids=None, names=None,
+                       filters=None):
+        """
+        Check which of many resource ids and 'Name' tags exist, in chunked describe_* calls
+
+        IDs are matched by the ``id_filter`` filter rather than by the *Ids parameter, as one
+        missing ID would fail the whole call.
+
+        Returns:
+            dict of id or name -> True if a resource matching ``filters`` has it, else False
+        """
+        if not ids and not names:
+            raise TypeError("Neither names nor ids were specified.")
+        found = set()
+        for filter_name, values in ((id_filter, ids), ('tag:Name', names)):
+            for chunk in _chunks(set(values or []), MAX_FILTER_VALUES):
+                chunk_filters = [{'Name': filter_name, 'Values': chunk}] + list(filters or [])
+                for item in _paginate(
+                        self.ec2_connection, operation, result_key, Filters=chunk_filters):
+                    found.add(item[id_key])
+                    found.add(_get_tag_value(item.get('Tags'), 'Name'))
+        results = {name: name in found for name in names or []}
+        results.update({id_: id_ in found for id_ in ids or []})
+        return results
+
+    def volumes_exist_and_available(self, volume_names=None, volume_ids=None):
+        """
+        Check existence and availability state for many volumes at once
+
+        Args:
+            volume_names: Names of volumes
+            volume_ids: IDs of volumes in format vol-random_chars
+
+        Returns:
+            dict of volume name or id -> True if the volume exists and is available
+        """
+        return self._find_existing(
+            'describe_volumes', 'Volumes', 'VolumeId', 'volume-id', ids=volume_ids,
+            names=volume_names, filters=[{'Name': 'status', 'Values': ['available']}])
+
+    def snapshots_exist(self, snapshot_names=None, snapshot_ids=None):
+        """
+        Check existence of many snapshots at once
+
+        Args:
+            snapshot_names: Names of snapshots
+            snapshot_ids: IDs of snapshots in format snap-random_chars
+
+        Returns:
+            dict of snapshot name or id -> True if the snapshot exists
+        """
+        return self._find_existing(
+            'describe_snapshots', 'Snapshots', 'SnapshotId', 'snapshot-id', ids=snapshot_ids,
+            names=snapshot_names)
 
     def volume_exists_and_available(self, volume_name=None, volume_id=None):
         """
@@ -962,39 +2257,9 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
             False if volume doesn't exist or is not available.
         """
         if volume_id:
-            try:
-                response = self.ec2_connection.describe_volumes(
-                    VolumeIds=[volume_id],
-                    Filters=[
-                        {
-                            'Name': 'status',
-                            'Values': ['available']
-                        }
-                    ]
-                )
-                if response.get('Volumes'):
-                    return True
-                else:
-                    return False
-            except Exception:
-                return False
+            return self.volumes_exist_and_available(volume_ids=[volume_id])[volume_id]
         elif volume_name:
-            response = self.ec2_connection.describe_volumes(
-                Filters=[
-                    {
-                        'Name': 'status',
-                        'Values': ['available']
-                    },
-                    {
-                        'Name': 'tag:Name',
-                        'Values': [volume_name]
-                    }
-                ]
-            )
-            if response.get('Volumes'):
-                return True
-            else:
-                return False
+            return self.volumes_exist_and_available(volume_names=[volume_name])[volume_name]
         else:
             raise TypeError("Neither volume_name nor volume_id were specified.")
 
@@ -1012,27 +2277,9 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
             False if snapshot doesn't exist.
         """
         if snapshot_id:
-            try:
-                response = self.ec2_connection.describe_snapshots(SnapshotIds=[snapshot_id])
-                if response.get('Snapshots'):
-                    return True
-                else:
-                    return False
-            except Exception:
-                return False
+            return self.snapshots_exist(snapshot_ids=[snapshot_id])[snapshot_id]
         elif snapshot_name:
-            response = self.ec2_connection.describe_snapshots(
-                Filters=[
-                    {
-                        'Name': 'tag:Name',
-                        'Values': [snapshot_name]
-                    }
-                ]
-            )
-            if response.get('Snapshots'):
-                return True
-            else:
-                return False
+            return self.snapshots_exist(snapshot_names=[snapshot_name])[snapshot_name]
         else:
             raise TypeError("Neither snapshot_name nor snapshot_id were specified.")
 
@@ -1060,49 +2307,69 @@ class EC2System(System, VmMixin, TemplateMixin, StackMixin):
             self.logger.exception("Copy snapshot with id '%s' failed.", source_snapshot_id)
             return False
 
-    def list_load_balancer(self):
+    def _fetch_network_resources(self, category):
+        client_attr, operation, result_key, id_key = NETWORK_RESOURCES[category]
+        by_id = {}
+        by_name = {}
+        for item in _paginate(getattr(self, client_attr), operation, result_key):
+            item_id = item[id_key]
+            by_id[item_id] = item
+            if category == 'security_groups':
+                name = item['GroupName']
+            else:
+                # Names are tags which are not mandatory, the tag with key called Name will be
+                # used. If no tag name is provided, CFME displays the ID as the name.
+                name = _get_tag_value(item.get('Tags'), 'Name') or item_id
+            by_name.setdefault(name, []).append(item_id)
+        return {'by_id': by_id, 'by_name': by_name}
+
+    def network_snapshot(self, force_refresh=False):
+        """
+        Returns an inventory of the VPCs, subnets, route tables, security groups and load balancers
+
+        All categories are fetched concurrently through paginated boto3 calls. The snapshot is
+        kept for ``network_cache_ttl`` seconds (default 60), so the ``list_*`` methods, which
+        are views over it, share one fetch. They take ``force_refresh`` too, to see resources
+        created since the snapshot was taken.
+
+        Returns:
+            dict of category -> dict with 'by_id' (ID -> boto3 data) and 'by_name' (name -> list
+            of IDs, the name being the 'Name' tag or else the ID)
+        """
+        snapshot = getattr(self, '_network_snapshot', None)
+        ttl = self.kwargs.get('network_cache_ttl', 60)
+        if force_refresh or snapshot is None or time.time() - snapshot['loaded_at'] > ttl:
+            with ThreadPoolExecutor(max_workers=len(NETWORK_RESOURCES)) as executor:
+                futures = {
+                    category: executor.submit(self._fetch_network_resources, category)
+                    for category in NETWORK_RESOURCES}
+                snapshot = {
+                    category: future.result() for category, future in futures.items()}
+            snapshot['loaded_at'] = time.time()
+            self._network_snapshot = snapshot
+        return snapshot
+
+    def _list_network_names(self, category, force_refresh=False):
+        return [
+            name
+            for name, ids in self.network_snapshot(force_refresh)[category]['by_name'].items()
+            for _ in ids]
+
+    def list_load_balancer(self, force_refresh=False):
         self.logger.info("Attempting to List EC2 Load Balancers")
-        return [loadbalancer.name for loadbalancer in self.elb_connection.get_all_load_balancers()]
+        return list(self.network_snapshot(force_refresh)['load_balancers']['by_id'])
 
-    def list_network(self):
+    def list_network(self, force_refresh=False):
         self.logger.info("Attempting to List EC2 Virtual Private Networks")
-        networks = self.ec2_connection.describe_network_acls()['NetworkAcls']
-        # EC2 api does not return the tags of the networks.... so returns only the IDs.
-        return [vpc_id['VpcId'] for vpc_id in networks]
+        return list(self.network_snapshot(force_refresh)['vpcs']['by_id'])
 
-    def list_subnet(self):
+    def list_subnet(self, force_refresh=False):
         self.logger.info("Attempting to List EC2 Subnets")
-        subnets = self.ec2_connection.describe_subnets()['Subnets']
-        subnets_names = []
-
-        # Subnets are not having mandatory tags names. They can have multiple tags, but only the tag
-        # 'Name' will be taken as the subnet name. If not tag is given, CFME displays the SubnetId
-        for subnet in subnets:
-            if 'Tags' in subnet and subnet['Tags']:
-                for tag in subnet['Tags']:
-                    if 'Name' in tag.values():
-                        subnets_names.append(tag['Value'])
-            else:
-                subnets_names.append(subnet['SubnetId'])
-        return subnets_names
+        return self._list_network_names('subnets', force_refresh)
 
-    def list_security_group(self):
+    def list_security_group(self, force_refresh=False):
         self.logger.info("Attempting to List EC2 security groups")
-        return [sec_gp.name for sec_gp in self.api.get_all_security_groups()]
-
-    def list_router(self):
-        route_tables = self.ec2_connection.describe_route_tables()['RouteTables']
-        routers_names = []
-
-        # Routers names are tags which are not mandatory, and tag with key called Name will be
-        # used to name the router. If no tag name is provided, the routerTableId will be
-        # displayed as name in CFME.
-        for route in route_tables:
-            if route['Tags']:
-                for tag in route['Tags']:
-                    if 'Name' in tag.values():
-                        routers_names.append(tag['Value'])
-            else:
-                routers_names.append(route['RouteTableId'])
+        return self._list_network_names('security_groups', force_refresh)
 
-        return routers_names
+    def list_router(self, force_refresh=False):
+        return self._list_network_names('route_tables', force_refresh)
@@ -7,6 +7,7 @@ from __future__ import absolute_import
 
 import json
 import time
+from collections import deque
 from contextlib import contextmanager
 from datetime import datetime
 from functools import partial
@@ -59,6 +60,10 @@ def _request_timeout_handler(self, url, method, retry_count=0, **kwargs):
             return self.request(url, method, retry_count=retry_count, **kwargs)
 
 
+# Default page size of listings, the default max limit of the nova and cinder APIs
+DEFAULT_PAGE_SIZE = 1000
+
+
 class OpenstackInstance(Instance):
     state_map = {
         'PAUSED': VmState.PAUSED,
@@ -556,6 +561,7 @@ class OpenstackSystem(System, VmMixin, TemplateMixin):
         if int(self.keystone_version) not in (2, 3):
             raise KeystoneVersionNotSupported(self.keystone_version)
         self.domain_id = kwargs['domain_id'] if self.keystone_version == 3 else None
+        self.page_size = kwargs.get('page_size', DEFAULT_PAGE_SIZE)
         self._session = None
         self._api = None
         self._kapi = None
@@ -690,37 +696,49 @@ class OpenstackSystem(System, VmMixin, TemplateMixin):
     def create_vm(self):
         raise NotImplementedError('create_vm not implemented.')
 
-    def _generic_paginator(self, f):
+    def _generic_paginator(self, f, limit=None):
         """A generic paginator for OpenStack services
 
-        Takes a callable and recursively runs the "listing" until no more are returned
-        by sending the ```marker``` kwarg to offset the search results. We try to rollback
-        up to 10 times in the markers in case one was deleted. If we can't rollback after
-        10 times, we give up.
-        Possible improvement is to roll back in 5s or 10s, but then we have to check for
-        uniqueness and do dup removals.
+        Takes a callable and generates the items of the "listing" page by page, sending the
+        ```limit``` kwarg as the page size and the ```marker``` kwarg to offset the search
+        results. Pages are only requested as items are consumed, so the listing stops early
+        when the consumer does. We try to rollback up to 10 times in the markers in case one
+        was deleted, skipping the items we already generated. If we can't rollback after 10
+        times, we give up.
+
+        A page shorter than the previous ones ends the listing without an extra empty request.
+        The server may cap ```limit``` at its own max, so a first page shorter than ```limit```
+        still takes one more request to confirm it is the last one.
+
+        Args:
+            f: callable accepting ``marker`` and ``limit`` kwargs and returning a list
+            limit (int): page size, defaults to ``self.page_size``
         """
-        lists = []
-        marker = None
+        limit = limit or self.page_size
+        # ids of the last generated items, newest last
+        markers = deque(maxlen=10)
+        full_page_size = None
         while True:
-            if not lists:
-                temp_list = f()
+            if not markers:
+                page = f(limit=limit)
             else:
-                for i in range(min(10, len(lists))):
-                    list_offset = -(i + 1)
-                    marker = lists[list_offset].id
+                for marker in reversed(markers):
                     try:
-                        temp_list = f(marker=marker)
+                        page = f(marker=marker, limit=limit)
                         break
-                    except os_exceptions.BadRequest:
+                    except (os_exceptions.BadRequest, cinder_exceptions.BadRequest):
                         continue
                 else:
                     raise Exception("Could not get list, maybe mass deletion after 10 marker tries")
-            if temp_list:
-                lists.extend(temp_list)
-            else:
-                break
-        return lists
+            if not page:
+                return
+            for item in page:
+                if item.id not in markers:
+                    markers.append(item.id)
+                    yield item
+            if full_page_size is not None and len(page) < full_page_size:
+                return
+            full_page_size = max(full_page_size or 0, len(page))
 
     def list_vms(self, filter_tenants=True):
         call = partial(self.api.servers.list, True, {'all_tenants': True})
@@ -729,8 +747,8 @@ class OpenstackSystem(System, VmMixin, TemplateMixin):
             # Filter instances based on their tenant ID
             # needed for CFME 5.3 and higher
             tenants = self._get_tenants()
-            ids = [tenant.id for tenant in tenants]
-            instances = [i for i in instances if i.tenant_id in ids]
+            ids = set(tenant.id for tenant in tenants)
+            instances = (i for i in instances if i.tenant_id in ids)
         return [OpenstackInstance(system=self, uuid=i.id, raw=i) for i in instances]
 
     def find_vms(self, name=None, id=None, ip=None):
@@ -802,7 +820,7 @@ class OpenstackSystem(System, VmMixin, TemplateMixin):
         raise NotImplementedError
 
     def list_templates(self):
-        images = self.api.images.list()
+        images = self._generic_paginator(self.api.images.list)
         return [OpenstackImage(system=self, uuid=i.id, raw=i) for i in images]
 
     def find_templates(self, name):
@@ -838,7 +856,7 @@ class OpenstackSystem(System, VmMixin, TemplateMixin):
         return [flavor.name for flavor in flavor_list]
 
     def list_volume(self):  # TODO: maybe names? Could not get it to work via API though ...
-        volume_list = self.capi.volumes.list()
+        volume_list = self._generic_paginator(self.capi.volumes.list)
         return [volume.id for volume in volume_list]
 
     def list_network(self):
@@ -6,26 +6,30 @@ Used to communicate with providers without using CFME facilities
 from __future__ import absolute_import
 
 import atexit
+import hashlib
+import json
 import operator
+import os
 import re
 import ssl
 import threading
 import time
+from collections import defaultdict, namedtuple
 from datetime import datetime
 from distutils.version import LooseVersion
 from functools import partial
 
 import pytz
 import six
-from cached_property import threaded_cached_property
-from pyVim.connect import Disconnect, SmartConnect
+from cached_property import cached_property
+from pyVim.connect import Disconnect, SmartConnect, SmartStubAdapter
 from pyVmomi import vim, vmodl
 from wait_for import TimedOutError, wait_for
 
 from wrapanapi.entities import (Template, TemplateMixin, Vm, VmMixin,
                                 VmState)
 from wrapanapi.entities.base import Entity
-from wrapanapi.exceptions import (HostNotRemoved, NotFoundError,
+from wrapanapi.exceptions import (HostNotRemoved, ItemNotFound, NotFoundError,
                                   VMCreationDateError, VMInstanceNotCloned,
                                   VMInstanceNotFound, VMInstanceNotSuspended,
                                   VMNotFoundViaIP)
@@ -100,6 +104,9 @@ TRAVERSAL_SPECS = [
     }
 ]
 
+# Max number of objects returned per RetrievePropertiesEx/ContinueRetrievePropertiesEx call
+DEFAULT_PAGE_SIZE = 1000
+
 
 def get_task_error_message(task):
     """Depending on the error type, a different attribute may contain the error message. This
@@ -113,6 +120,124 @@ def get_task_error_message(task):
     return message
 
 
+DatastoreReservation = namedtuple('DatastoreReservation', ['datastore', 'name', 'size'])
+
+
+class DatastorePlacement(object):
+    """
+    Picks datastores for new VMs, based on a cached view of datastore free space
+
+    Capacity and free space of all datastores are fetched in one property retrieval and
+    cached for ``ttl`` seconds. Clones in flight hold a reservation for the space they are
+    expected to use, so concurrent deploys see each other's usage and spread over the
+    allowed datastores instead of all picking the same one.
+
+    Placements are shared process-wide by all systems for the same vCenter and credentials
+    (see ``get``), as deploys typically each use a System of their own.
+    """
+    _placements = {}
+    _placements_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, system, ttl=60):
+        """Get the placement shared by all systems with the session key of ``system``"""
+        with cls._placements_lock:
+            placement = cls._placements.get(system._session_key)
+            if placement is None:
+                placement = cls._placements[system._session_key] = cls(system, ttl=ttl)
+            return placement
+
+    def __init__(self, system, ttl=60):
+        """
+        Args:
+            system: instance of VMWareSystem
+            ttl: seconds after which the datastore data is fetched again
+        """
+        self.system = system
+        self.ttl = ttl
+        self._datastores = {}  # name -> dict of datastore properties
+        self._refreshed_at = None
+        self._reservations = []
+        self._lock = threading.RLock()
+
+    def refresh(self):
+        """Fetch capacity, free space and status of all datastores"""
+        view = self.system._get_container_view(vim.Datastore)
+        datastores = {}
+        for obj, props in self.system._retrieve_properties(
+                vim.Datastore,
+                ['name', 'overallStatus', 'summary.accessible', 'summary.multipleHostAccess',
+                 'summary.capacity', 'summary.freeSpace'],
+                begin_entity=view):
+            datastores[props['name']] = {
+                'obj': obj,
+                'usable': (bool(props.get('summary.accessible'))
+                           and bool(props.get('summary.multipleHostAccess'))
+                           and props.get('overallStatus') != "red"),
+                'capacity': props.get('summary.capacity') or 0,
+                'free': props.get('summary.freeSpace') or 0,
+            }
+        with self._lock:
+            self._datastores = datastores
+            self._refreshed_at = time.time()
+
+    def _pick(self, allowed_datastores, size):
+        """Pick the allowed datastore with most free space left after reservations"""
+        if self._refreshed_at is None or time.time() - self._refreshed_at > self.ttl:
+            self.refresh()
+        reserved = defaultdict(int)
+        pending = defaultdict(int)
+        for reservation in self._reservations:
+            reserved[reservation.name] += reservation.size
+            pending[reservation.name] += 1
+
+        candidates = []
+        for name, ds in self._datastores.items():
+            if name not in allowed_datastores or not ds['usable'] or not ds['capacity']:
+                continue
+            free = ds['free'] - reserved[name] - size
+            if free < 0:
+                continue
+            # prefer the emptiest datastore, then the one with fewer clones in flight
+            candidates.append((float(free) / float(ds['capacity']), -pending[name], name))
+        if not candidates:
+            raise Exception("No possible datastores!")
+        return max(candidates)[2]
+
+    def pick(self, allowed_datastores, size=0):
+        """
+        Pick a datastore by free space, without reserving it
+
+        Args:
+            allowed_datastores (list): names of the datastores to pick from
+            size (int): bytes the new VM is expected to use
+        Returns:
+            pyVmomi.vim.Datastore
+        """
+        with self._lock:
+            return self._datastores[self._pick(allowed_datastores, size)]['obj']
+
+    def reserve(self, allowed_datastores, size=0):
+        """
+        Pick a datastore by free space and reserve ``size`` bytes on it until ``release``
+
+        Returns:
+            DatastoreReservation
+        """
+        with self._lock:
+            name = self._pick(allowed_datastores, size)
+            reservation = DatastoreReservation(self._datastores[name]['obj'], name, size)
+            self._reservations.append(reservation)
+            return reservation
+
+    def release(self, reservation):
+        """Drop a reservation once its clone has finished, and refresh on the next pick"""
+        with self._lock:
+            if reservation in self._reservations:
+                self._reservations.remove(reservation)
+            self._refreshed_at = None
+
+
 class VMWareVMOrTemplate(Entity):
     """
     Holds shared methods/properties that VM's and templates have in common.
@@ -217,16 +342,70 @@ class VMWareVMOrTemplate(Entity):
 
     def _pick_datastore(self, allowed_datastores):
         """Pick a datastore based on free space."""
-        possible_datastores = [
-            ds for ds in self.system.get_obj_list(vim.Datastore)
-            if ds.name in allowed_datastores and ds.summary.accessible and
-            ds.summary.multipleHostAccess and ds.overallStatus != "red"]
-        possible_datastores.sort(
-            key=lambda ds: float(ds.summary.freeSpace) / float(ds.summary.capacity),
-            reverse=True)
-        if not possible_datastores:
-            raise Exception("No possible datastores!")
-        return possible_datastores[0]
+        return self.system.datastore_placement.pick(allowed_datastores)
+
+    def _find_snapshot(self, snapshot_name=None):
+        """Find a snapshot of this VM/template by name.
+
+        Args:
+            snapshot_name (string): name of the snapshot, if None the current snapshot is used
+        Returns:
+            pyVmomi.vim.vm.Snapshot or None if no matching snapshot exists
+        """
+        if not self.raw.snapshot:
+            return None
+        if snapshot_name is None:
+            return self.raw.snapshot.currentSnapshot
+
+        trees = list(self.raw.snapshot.rootSnapshotList)
+        while trees:
+            tree = trees.pop(0)
+            if tree.name == snapshot_name:
+                return tree.snapshot
+            trees.extend(tree.childSnapshotList)
+        return None
+
+    def _get_or_create_clone_snapshot(self, snapshot_name=None, timeout=300):
+        """Get the snapshot used as the base disk of linked clones, create it if missing.
+
+        Templates cannot be snapshotted, so for a template the snapshot must already exist
+        (e.g. taken before the VM was marked as template).
+
+        Args:
+            snapshot_name (string): name of the snapshot, if None the current snapshot is used
+                for templates and a 'linked-clone-base' snapshot is used for VMs
+            timeout: time to wait for the snapshot creation task
+        Returns:
+            pyVmomi.vim.vm.Snapshot
+        Raises:
+            ItemNotFound if the snapshot does not exist and cannot be created
+        """
+        self.refresh()
+        snapshot = self._find_snapshot(snapshot_name)
+        if snapshot:
+            return snapshot
+
+        if self.raw.config.template:
+            raise ItemNotFound(snapshot_name or 'current', 'snapshot of template {}'.format(
+                self.name))
+
+        snapshot_name = snapshot_name or 'linked-clone-base'
+        snapshot = self._find_snapshot(snapshot_name)
+        if snapshot:
+            return snapshot
+
+        self.logger.info("Creating snapshot '%s' of '%s' for linked clones",
+                         snapshot_name, self.name)
+        task = self.raw.CreateSnapshot_Task(
+            name=snapshot_name, description='Base snapshot for linked clones',
+            memory=False, quiesce=False)
+        wait_for(lambda: self.system.get_task_status(task) not in ['queued', 'running'],
+                 delay=3, timeout=timeout)
+        self.refresh()
+        snapshot = self._find_snapshot(snapshot_name)
+        if not snapshot:
+            raise ItemNotFound(snapshot_name, 'snapshot of {}'.format(self.name))
+        return snapshot
 
     def _get_resource_pool(self, resource_pool_name=None):
         """ Returns a resource pool managed object for a specified name.
@@ -245,10 +424,16 @@ class VMWareVMOrTemplate(Entity):
 
     def _clone(self, destination, resourcepool=None, datastore=None, power_on=True,
                sparse=False, template=False, provision_timeout=1800, progress_callback=None,
-               allowed_datastores=None, cpu=None, ram=None, **kwargs):
+               allowed_datastores=None, cpu=None, ram=None, linked_clone=False,
+               snapshot_name=None, **kwargs):
         """
         Clone this template to a VM
 
+        When ``linked_clone`` is True, the new VM's disks are created as delta disks backed by
+        a snapshot of the source (``diskMoveType=createNewChildDiskBacking``) instead of full
+        copies, which makes provisioning independent of the source disk size. The snapshot is
+        looked up by ``snapshot_name`` and, for VMs only, created if it does not exist yet.
+
         Returns a VMWareVirtualMachine object
         """
         try:
@@ -266,71 +451,92 @@ class VMWareVMOrTemplate(Entity):
 
         vm_clone_spec = vim.VirtualMachineCloneSpec()
         vm_reloc_spec = vim.VirtualMachineRelocateSpec()
-        # DATASTORE
-        if isinstance(datastore, six.string_types):
-            vm_reloc_spec.datastore = self.system.get_obj(vim.Datastore, name=datastore)
-        elif isinstance(datastore, vim.Datastore):
-            vm_reloc_spec.datastore = datastore
-        elif datastore is None:
-            if allowed_datastores is not None:
-                # Pick a datastore by space
-                vm_reloc_spec.datastore = self._pick_datastore(allowed_datastores)
-            else:
-                # Use the same datastore
-                datastores = source_template.datastore
-                if isinstance(datastores, (list, tuple)):
-                    vm_reloc_spec.datastore = datastores[0]
+        reservation = None
+        try:
+            # release the datastore reservation below also if picking the rest fails
+            # DATASTORE
+            if isinstance(datastore, six.string_types):
+                vm_reloc_spec.datastore = self.system.get_obj(vim.Datastore, name=datastore)
+            elif isinstance(datastore, vim.Datastore):
+                vm_reloc_spec.datastore = datastore
+            elif datastore is None:
+                if allowed_datastores is not None:
+                    # Pick a datastore by space, holding the space the clone needs until it is done
+                    size = 0 if linked_clone else source_template.summary.storage.committed
+                    reservation = self.system.datastore_placement.reserve(allowed_datastores, size)
+                    vm_reloc_spec.datastore = reservation.datastore
                 else:
-                    vm_reloc_spec.datastore = datastores
-        else:
-            raise NotImplementedError("{} not supported for datastore".format(datastore))
-        progress_callback("Picked datastore `{}`".format(vm_reloc_spec.datastore.name))
-
-        # RESOURCE POOL
-        if isinstance(resourcepool, vim.ResourcePool):
-            vm_reloc_spec.pool = resourcepool
-        else:
-            vm_reloc_spec.pool = self._get_resource_pool(resourcepool)
-        progress_callback("Picked resource pool `{}`".format(vm_reloc_spec.pool.name))
-
-        vm_reloc_spec.host = None
-        if sparse:
-            vm_reloc_spec.transform = vim.VirtualMachineRelocateTransformation().sparse
-        else:
-            vm_reloc_spec.transform = vim.VirtualMachineRelocateTransformation().flat
-
-        vm_clone_spec.powerOn = power_on
-        vm_clone_spec.template = template
-        vm_clone_spec.location = vm_reloc_spec
-        vm_clone_spec.snapshot = None
+                    # Use the same datastore
+                    datastores = source_template.datastore
+                    if isinstance(datastores, (list, tuple)):
+                        vm_reloc_spec.datastore = datastores[0]
+                    else:
+                        vm_reloc_spec.datastore = datastores
+            else:
+                raise NotImplementedError("{} not supported for datastore".format(datastore))
+            progress_callback("Picked datastore `{}`".format(vm_reloc_spec.datastore.name))
 
-        if cpu is not None:
-            vm_clone_spec.config.numCPUs = int(cpu)
-        if ram is not None:
-            vm_clone_spec.config.memoryMB = int(ram)
+            # RESOURCE POOL
+            if isinstance(resourcepool, vim.ResourcePool):
+                vm_reloc_spec.pool = resourcepool
+            else:
+                vm_reloc_spec.pool = self._get_resource_pool(resourcepool)
+            progress_callback("Picked resource pool `{}`".format(vm_reloc_spec.pool.name))
+
+            vm_reloc_spec.host = None
+            snapshot = None
+            if linked_clone:
+                snapshot = self._get_or_create_clone_snapshot(snapshot_name)
+                vm_reloc_spec.diskMoveType = 'createNewChildDiskBacking'
+                progress_callback("Picked snapshot `{}` for linked clone".format(
+                    snapshot_name or 'current'))
+            elif sparse:
+                vm_reloc_spec.transform = vim.VirtualMachineRelocateTransformation().sparse
+            else:
+                vm_reloc_spec.transform = vim.VirtualMachineRelocateTransformation().flat
 
-        try:
-            folder = source_template.parent.parent.vmParent
-        except AttributeError:
-            folder = source_template.parent
-        progress_callback("Picked folder `{}`".format(folder.name))
+            vm_clone_spec.powerOn = power_on
+            vm_clone_spec.template = template
+            vm_clone_spec.location = vm_reloc_spec
+            vm_clone_spec.snapshot = snapshot
 
-        task = source_template.CloneVM_Task(folder=folder, name=destination, spec=vm_clone_spec)
+            if cpu is not None:
+                vm_clone_spec.config.numCPUs = int(cpu)
+            if ram is not None:
+                vm_clone_spec.config.memoryMB = int(ram)
 
-        def _check(store=[task]):
             try:
-                if hasattr(store[0].info, 'progress') and store[0].info.progress is not None:
-                    progress_callback("{}/{}%".format(store[0].info.state, store[0].info.progress))
-                else:
-                    progress_callback("{}".format(store[0].info.state))
+                folder = source_template.parent.parent.vmParent
             except AttributeError:
-                pass
-            if store[0].info.state not in {"queued", "running"}:
-                return True
-            store[0] = self.system.get_updated_obj(store[0])
-            return False
+                folder = source_template.parent
+            progress_callback("Picked folder `{}`".format(folder.name))
 
-        wait_for(_check, num_sec=provision_timeout, delay=4)
+            start_time = time.time()
+            task = source_template.CloneVM_Task(
+                folder=folder, name=destination, spec=vm_clone_spec)
+
+            def _check(store=[task]):
+                try:
+                    if hasattr(store[0].info, 'progress') and store[0].info.progress is not None:
+                        progress_callback(
+                            "{}/{}%".format(store[0].info.state, store[0].info.progress))
+                    else:
+                        progress_callback("{}".format(store[0].info.state))
+                except AttributeError:
+                    pass
+                if store[0].info.state not in {"queued", "running"}:
+                    return True
+                store[0] = self.system.get_updated_obj(store[0])
+                return False
+
+            wait_for(_check, num_sec=provision_timeout, delay=4)
+            self.logger.info(
+                "Clone of '%s' to '%s' (%s) finished in %.1fs", self.name, destination,
+                'linked' if linked_clone else 'sparse' if sparse else 'flat',
+                time.time() - start_time)
+        finally:
+            if reservation:
+                self.system.datastore_placement.release(reservation)
 
         if task.info.state != 'success':
             self.logger.error(
@@ -410,6 +616,95 @@ class VMWareVMOrTemplate(Entity):
         vm_spec = vim.vm.ConfigSpec()
         vm_spec.deviceChange = [device_spec]
 
+        return self._reconfigure(vm_spec)
+
+    def add_disks(self, capacities_in_kb, provision_type=None):
+        """
+        Create many disks with a single reconfigure task
+
+        Free unit numbers are allocated once for all disks on the existing SCSI controllers,
+        and new SCSI controllers of the same type are added in the same config spec when the
+        existing ones are full.
+
+        Args:
+            capacities_in_kb (list): capacity of each new drive in Kilobytes
+            provision_type (string): 'thin' or 'thick', will default to thin if invalid option
+
+        Returns:
+            (bool, task_result): Tuple containing boolean True if task ended in success,
+                                 and the contents of task.result or task.error depending on state
+        """
+        provision_type = provision_type if provision_type in ['thick', 'thin'] else 'thin'
+        self.refresh()
+
+        devices = self.raw.config.hardware.device
+        controllers = [
+            device for device in devices
+            if isinstance(device, vim.vm.device.VirtualSCSIController)]
+        # unit 7 is reserved for the controller itself
+        used_units = {controller.key: {7} for controller in controllers}
+        for device in devices:
+            if device.controllerKey in used_units and device.unitNumber is not None:
+                used_units[device.controllerKey].add(int(device.unitNumber))
+        used_buses = {controller.busNumber for controller in controllers}
+        controller_cls = (type(controllers[0]) if controllers
+                          else vim.vm.device.ParaVirtualSCSIController)
+        free_slots = [
+            (controller.key, unit) for controller in controllers
+            for unit in range(16) if unit not in used_units[controller.key]]
+
+        device_changes = []
+        new_controller_key = -100  # temporary keys for devices created by this spec
+        for index, capacity_in_kb in enumerate(capacities_in_kb):
+            if not free_slots:
+                bus_number = next((bus for bus in range(4) if bus not in used_buses), None)
+                if bus_number is None:
+                    raise ValueError(
+                        'No free SCSI unit numbers left for {} more disks'.format(
+                            len(capacities_in_kb) - index))
+                used_buses.add(bus_number)
+                controller_spec = vim.vm.device.VirtualDeviceSpec()
+                controller_spec.operation = vim.vm.device.VirtualDeviceSpec.Operation.add
+                controller_spec.device = controller_cls()
+                controller_spec.device.key = new_controller_key
+                controller_spec.device.busNumber = bus_number
+                controller_spec.device.sharedBus = (
+                    vim.vm.device.VirtualSCSIController.Sharing.noSharing)
+                device_changes.append(controller_spec)
+                free_slots = [(new_controller_key, unit) for unit in range(16) if unit != 7]
+                new_controller_key -= 1
+            controller_key, unit_number = free_slots.pop(0)
+
+            backing_spec = vim.vm.device.VirtualDisk.FlatVer2BackingInfo()
+            backing_spec.diskMode = 'persistent'
+            backing_spec.thinProvisioned = (provision_type == 'thin')
+
+            disk_spec = vim.vm.device.VirtualDisk()
+            disk_spec.backing = backing_spec
+            disk_spec.key = -(index + 1)
+            disk_spec.unitNumber = unit_number
+            disk_spec.controllerKey = controller_key
+            disk_spec.capacityInKB = capacity_in_kb
+
+            device_spec = vim.vm.device.VirtualDeviceSpec()
+            device_spec.fileOperation = 'create'
+            device_spec.operation = vim.vm.device.VirtualDeviceSpec.Operation.add
+            device_spec.device = disk_spec
+            device_changes.append(device_spec)
+
+        vm_spec = vim.vm.ConfigSpec()
+        vm_spec.deviceChange = device_changes
+
+        return self._reconfigure(vm_spec)
+
+    def _reconfigure(self, vm_spec):
+        """
+        Run a ReconfigVM_Task with ``vm_spec`` and wait for it to finish
+
+        Returns:
+            (bool, task_result): Tuple containing boolean True if task ended in success,
+                                 and the contents of task.result or task.error depending on state
+        """
         # start vm reconfigure task
         task = self.raw.ReconfigVM_Task(spec=vm_spec)
 
@@ -461,7 +756,8 @@ class VMWareVirtualMachine(VMWareVMOrTemplate, Vm):
         """Detect the vm_creation_time either via uptime if non-zero, or by last boot time
 
         The API provides no sensible way to actually get this value. The only way in which
-        vcenter API MAY have this is by filtering through events
+        vcenter API MAY have this is by filtering through events. Use
+        VMWareSystem.get_creation_times when querying many VMs.
 
         Return tz-naive datetime object
         """
@@ -544,6 +840,9 @@ class VMWareTemplate(VMWareVMOrTemplate, Template):
         """
         Clone a VM based on this template, wait for it to reach desired power state.
 
+        Pass ``linked_clone=True`` (and optionally ``snapshot_name``) to deploy a linked clone
+        backed by an existing snapshot of this template, see ``_clone``.
+
         Returns a VMWareVirtualMachine object
         """
         kwargs["power_on"] = kwargs.pop("power_on", True)
@@ -559,6 +858,181 @@ class VMWareTemplate(VMWareVMOrTemplate, Template):
         return new_vm
 
 
+class _PooledSession(object):
+    """A logged in service instance and its service content, handed out by a pool"""
+
+    def __init__(self, si):
+        self.si = si
+        self.content = si.RetrieveContent()
+        self.expired = False
+        self.checked_at = time.time()
+        self._views = {}  # (vimtype, folder) -> vim.view.ContainerView
+        self._views_lock = threading.Lock()
+
+    def get_view(self, vimtype, folder):
+        """
+        Get a container view of ``vimtype`` objects under ``folder``
+
+        The server keeps a container view up to date, so each view is created once per session
+        and reused by all systems sharing the session, until ``destroy_views()``.
+        """
+        key = (vimtype, folder)
+        with self._views_lock:
+            if key not in self._views:
+                self._views[key] = self.content.viewManager.CreateContainerView(
+                    folder, [vimtype], True)
+            return self._views[key]
+
+    def destroy_views(self):
+        """Destroy the container views created on this session"""
+        with self._views_lock:
+            views = list(self._views.values())
+            self._views.clear()
+        if self.expired:
+            # the server already dropped them with the session
+            return
+        for view in views:
+            try:
+                view.Destroy()
+            except Exception:
+                pass
+
+    def is_authenticated(self):
+        """Ask the server whether this session is still logged in, marks it expired if not"""
+        try:
+            authenticated = self.content.sessionManager.currentSession is not None
+        except vim.fault.NotAuthenticated:
+            authenticated = False
+        self.checked_at = time.time()
+        if not authenticated:
+            self.expired = True
+        return authenticated
+
+    def check(self, interval):
+        """Return whether the session is usable, asking the server at most every ``interval``"""
+        if not self.expired and time.time() - self.checked_at > interval:
+            self.is_authenticated()
+        return not self.expired
+
+
+class _ServiceInstancePool(object):
+    """
+    Process-wide pool of logged in vCenter sessions for one vCenter host and user
+
+    Pools are shared by all VMWareSystem objects with the same identifying attributes, so a
+    new System does not have to log in and retrieve the service content again. Up to ``size``
+    sessions are created lazily and handed out round-robin, which lets callers in different
+    threads issue SOAP calls in parallel. A single daemon thread keeps all pooled sessions
+    alive, and they are disconnected at interpreter exit unless they are meant to be resumed
+    by another process (see ``VMWareSystem`` ``session_file``).
+
+    Sessions expire when vCenter restarts or times them out, so they are checked at most every
+    ``SESSION_CHECK_INTERVAL`` seconds when handed out, and expired ones are replaced by
+    logging in again.
+    """
+    KEEPALIVE_INTERVAL = 600
+    SESSION_CHECK_INTERVAL = 60
+
+    _pools = {}
+    _pools_lock = threading.Lock()
+    _keepalive_thread = None
+
+    def __init__(self, size=1):
+        self.size = size
+        self.persistent = False
+        self._sessions = []  # list of _PooledSession
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, key, size=1):
+        """Get the pool for ``key``, creating it (and the shared keep-alive) if needed"""
+        with cls._pools_lock:
+            if cls._keepalive_thread is None:
+                atexit.register(cls.disconnect_all)
+                cls._keepalive_thread = threading.Thread(target=cls._keepalive)
+                cls._keepalive_thread.daemon = True
+                cls._keepalive_thread.start()
+            pool = cls._pools.get(key)
+            if pool is None:
+                pool = cls._pools[key] = cls(size)
+            pool.size = max(pool.size, size)
+            return pool
+
+    @classmethod
+    def _all_sessions(cls):
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+        return [(pool, session) for pool in pools for session in list(pool._sessions)]
+
+    @classmethod
+    def _keepalive(cls):
+        """
+        Send a 'current time' request for every pooled session every 10 min as a
+        connection keep-alive
+
+        See https://github.com/vmware/pyvmomi/issues/347 for why this is needed.
+        """
+        while True:
+            time.sleep(cls.KEEPALIVE_INTERVAL)
+            for _, session in cls._all_sessions():
+                try:
+                    session.si.CurrentTime()
+                    session.is_authenticated()
+                except Exception:
+                    pass
+
+    @classmethod
+    def disconnect_all(cls):
+        """
+        Destroy the container views of all pooled sessions and log out of them, except the ones
+        persisted for other processes
+        """
+        for pool, session in cls._all_sessions():
+            session.destroy_views()
+            if not pool.persistent:
+                try:
+                    Disconnect(session.si)
+                except Exception:
+                    pass
+
+    def acquire(self, connect):
+        """
+        Get a _PooledSession from the pool
+
+        Args:
+            connect: callable taking the index of the new session in the pool and returning a
+                logged in service instance, called while the pool is not full yet, or to replace
+                an expired session
+        """
+        with self._lock:
+            if len(self._sessions) < self.size:
+                session = _PooledSession(connect(len(self._sessions)))
+                self._sessions.append(session)
+                return session
+            index = self._next % len(self._sessions)
+            self._next += 1
+            session = self._sessions[index]
+            if not session.check(self.SESSION_CHECK_INTERVAL):
+                session = self._sessions[index] = _PooledSession(connect(index))
+            return session
+
+    def renew(self, session, connect):
+        """
+        Replace an expired session by logging in again, see ``acquire``
+
+        Returns:
+            the new _PooledSession, or the one another thread already replaced it with
+        """
+        with self._lock:
+            if session in self._sessions:
+                index = self._sessions.index(session)
+                session = self._sessions[index] = _PooledSession(connect(index))
+                return session
+        # already replaced by another thread
+        return self.acquire(connect)
+
+
 class VMWareSystem(System, VmMixin, TemplateMixin):
     """Client to Vsphere API
 
@@ -566,6 +1040,10 @@ class VMWareSystem(System, VmMixin, TemplateMixin):
         hostname: The hostname of the system.
         username: The username to connect with.
         password: The password to connect with.
+        connection_pool_size: Number of vCenter sessions shared by all systems for this
+            hostname/username/password in this process, threads are assigned one of them (default 1)
+        session_file: Optional path of a file to persist the session cookie in, so another
+            process can resume the session instead of logging in again
 
     See also:
 
@@ -576,10 +1054,11 @@ class VMWareSystem(System, VmMixin, TemplateMixin):
     _api = None
 
     _stats_available = {
-        'num_vm': lambda self: len(self.list_vms()),
+        'num_vm': lambda self: sum(1 for _ in self._list_vms_or_templates()),
         'num_host': lambda self: len(self.list_host()),
         'num_cluster': lambda self: len(self.list_cluster()),
-        'num_template': lambda self: len(self.list_templates()),
+        'num_template': lambda self: sum(
+            1 for _ in self._list_vms_or_templates(template=True)),
         'num_datastore': lambda self: len(self.list_datastore()),
     }
 
@@ -591,9 +1070,11 @@ class VMWareSystem(System, VmMixin, TemplateMixin):
         self.hostname = hostname
         self.username = username
         self.password = password
-        self._service_instance = None
-        self._content = None
+        self._session_pool = _ServiceInstancePool.get(
+            self._session_key, size=kwargs.get('connection_pool_size', 1))
+        self._thread_local = threading.local()
         self._vm_obj_cache = {}  # stores pyvmomi vm obj's we have previously pulled
+        self._obj_name_cache = {}  # (vimtype, folder) -> {name: pyvmomi obj}
         self.kwargs = kwargs
 
     @property
@@ -608,32 +1089,71 @@ class VMWareSystem(System, VmMixin, TemplateMixin):
     def can_pause(self):
         return False
 
-    def _start_keepalive(self):
-        """
-        Send a 'current time' request to vCenter every 10 min as a
-        connection keep-alive
-        """
-        def _keepalive():
-            while True:
-                self.logger.debug(
-                    "vCenter keep-alive: %s", self.service_instance.CurrentTime()
-                )
-                time.sleep(600)
+    @property
+    def _session_key(self):
+        # a fingerprint of the password keeps systems with other credentials out of the pool
+        fingerprint = hashlib.sha256(
+            u'{}:{}'.format(self.username, self.password).encode('utf-8')).hexdigest()[:16]
+        return tuple(sorted(self._identifying_attrs.items())) + (
+            ('username', self.username), ('credentials', fingerprint))
 
-        t = threading.Thread(target=_keepalive)
-        t.daemon = True
-        t.start()
+    @property
+    def session_file(self):
+        return self.kwargs.get("session_file")
 
-    def _create_service_instance(self):
-        """
-        Create service instance and start a keep-alive thread
+    def _load_session_cookie(self):
+        try:
+            with open(self.session_file) as f:
+                return json.load(f).get(repr(self._session_key))
+        except (IOError, OSError, ValueError):
+            return None
 
-        See https://github.com/vmware/pyvmomi/issues/347 for why this is needed.
+    def _save_session_cookie(self, cookie):
+        try:
+            with open(self.session_file) as f:
+                cookies = json.load(f)
+        except (IOError, OSError, ValueError):
+            cookies = {}
+        cookies[repr(self._session_key)] = cookie
+        # the cookie grants access to the session, keep it private
+        fd = os.open(self.session_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(cookies, f)
+
+    def _resume_session(self, context):
+        """Return a service instance for a persisted session cookie, if it is still valid"""
+        cookie = self._load_session_cookie()
+        if not cookie:
+            return None
+        try:
+            stub = SmartStubAdapter(host=self.hostname, sslContext=context)
+            stub.cookie = cookie
+            si = vim.ServiceInstance('ServiceInstance', stub)
+            if si.content.sessionManager.currentSession is None:
+                return None
+        except Exception:
+            self.logger.debug("Persisted vCenter session could not be resumed", exc_info=True)
+            return None
+        self.logger.info(
+            "Resumed vCenter session on host %s as user %s", self.hostname, self.username)
+        return si
+
+    def _create_service_instance(self, index=0):
+        """
+        Create service instance, the first session of the pool is resumed from/persisted
+        to ``session_file`` if set
         """
+        # Disable SSL cert verification
+        context = ssl.SSLContext(ssl.PROTOCOL_TLSv1)
+        context.verify_mode = ssl.CERT_NONE
+        persist = bool(self.session_file) and index == 0
+        if persist:
+            self._session_pool.persistent = True
+            si = self._resume_session(context)
+            if si:
+                return si
+
         try:
-            # Disable SSL cert verification
-            context = ssl.SSLContext(ssl.PROTOCOL_TLSv1)
-            context.verify_mode = ssl.CERT_NONE
             si = SmartConnect(
                 host=self.hostname,
                 user=self.username,
@@ -644,58 +1164,127 @@ class VMWareSystem(System, VmMixin, TemplateMixin):
             self.logger.error("Failed to connect to vCenter")
             raise
 
-        # Disconnect at teardown
-        atexit.register(Disconnect, si)
-
         self.logger.info(
             "Connected to vCenter host %s as user %s",
             self.hostname, self.username
         )
 
-        self._start_keepalive()
+        if persist:
+            self._save_session_cookie(si._stub.cookie)
         return si
 
-    @threaded_cached_property
+    def _get_session(self):
+        """Get the _PooledSession assigned to the current thread, replacing it if expired"""
+        session = getattr(self._thread_local, 'session', None)
+        if session is None:
+            self.logger.debug("Attempting to initiate vCenter service instance")
+            session = self._session_pool.acquire(self._create_service_instance)
+            self._thread_local.session = session
+        elif not session.check(self._session_pool.SESSION_CHECK_INTERVAL):
+            self.logger.info(
+                "vCenter session on host %s expired, logging in again", self.hostname)
+            session = self._session_pool.renew(session, self._create_service_instance)
+            self._thread_local.session = session
+        return session
+
+    @property
     def service_instance(self):
         """An instance of the service"""
-        self.logger.debug("Attempting to initiate vCenter service instance")
-        return self._create_service_instance()
+        return self._get_session().si
 
-    @threaded_cached_property
+    @property
     def content(self):
-        self.logger.debug("calling RetrieveContent()... this might take awhile")
-        return self.service_instance.RetrieveContent()
+        return self._get_session().content
 
     @property
     def version(self):
         """The product version"""
         return LooseVersion(self.content.about.version)
 
+    @cached_property
+    def datastore_placement(self):
+        """DatastorePlacement used to pick datastores for clones, shared with other systems"""
+        return DatastorePlacement.get(self, ttl=self.kwargs.get("datastore_cache_ttl", 60))
+
     @property
     def default_resource_pool(self):
         return self.kwargs.get("default_resource_pool")
 
+    @property
+    def page_size(self):
+        return self.kwargs.get("page_size", DEFAULT_PAGE_SIZE)
+
+    def _get_container_view(self, vimtype, folder=None):
+        """Get a container view of ``vimtype`` objects under ``folder``
+
+        Views are pooled with the session the current thread uses, so they are shared with the
+        other systems using that session, and destroyed with it (see ``_PooledSession``).
+        """
+        session = self._get_session()
+        return session.get_view(vimtype, folder or session.content.rootFolder)
+
     def get_obj_list(self, vimtype, folder=None):
         """Get a list of objects of type ``vimtype``"""
-        folder = folder or self.content.rootFolder
-        container = self.content.viewManager.CreateContainerView(folder, [vimtype], True)
-        return container.view
-
-    def get_obj(self, vimtype, name, folder=None):
-        """Get an object of type ``vimtype`` with name ``name`` from Vsphere"""
-        obj = None
-        for item in self.get_obj_list(vimtype, folder):
-            if item.name == name:
-                obj = item
-                break
+        return self._get_container_view(vimtype, folder).view
+
+    def _list_obj_names(self, vimtype, folder=None):
+        """Get names of all objects of type ``vimtype``, retrieved in one property retrieval"""
+        view = self._get_container_view(vimtype, folder)
+        return [str(props['name'])
+                for _, props in self._retrieve_properties(vimtype, ['name'], begin_entity=view)]
+
+    def get_obj_names(self, vimtype, folder=None, force=False):
+        """
+        Get a dict of name -> object for all objects of type ``vimtype``
+
+        The names are retrieved in one property retrieval and cached per vimtype/folder.
+
+        Args:
+            vimtype: pyVmomi managed object type, e.g. vim.Datastore
+            folder: folder to search in, defaults to rootFolder
+            force (bool): Ignore the cache when updating
+        """
+        key = (vimtype, folder or self.content.rootFolder)
+        if force or key not in self._obj_name_cache:
+            view = self._get_container_view(vimtype, folder)
+            objs = {}
+            for obj, props in self._retrieve_properties(vimtype, ['name'], begin_entity=view):
+                objs.setdefault(props['name'], obj)
+            self._obj_name_cache[key] = objs
+        return self._obj_name_cache[key]
+
+    def get_obj(self, vimtype, name, folder=None, force=False):
+        """Get an object of type ``vimtype`` with name ``name`` from Vsphere
+
+        Args:
+            force (bool): Ignore the name cache, see ``get_obj_names``
+        """
+        obj = self.get_obj_names(vimtype, folder, force=force).get(name)
+        if obj is None and not force:
+            # the object may have been created after the cache was built
+            obj = self.get_obj_names(vimtype, folder, force=True).get(name)
         return obj
 
+    def _forget_obj(self, vimtype, name, folder=None):
+        """Drop the object named ``name`` from the name cache, e.g. after deleting it"""
+        key = (vimtype, folder or self.content.rootFolder)
+        self._obj_name_cache.get(key, {}).pop(name, None)
+
+    def _call_with_obj(self, vimtype, name, func):
+        """
+        Call ``func(obj)`` with the object named ``name`` from ``get_obj``
+
+        A cached object may have been deleted on the server meanwhile (and maybe recreated
+        under the same name), so on ManagedObjectNotFound it is resolved again and retried.
+        """
+        try:
+            return func(self.get_obj(vimtype, name))
+        except vmodl.fault.ManagedObjectNotFound:
+            return func(self.get_obj(vimtype, name, force=True))
+
     def _search_folders_for_vm(self, name):
         # First get all VM folders
-        container = self.content.viewManager.CreateContainerView(
-            self.content.rootFolder, [vim.Folder], True)
-        folders = container.view
-        container.Destroy()
+        folders = self.get_obj_list(vim.Folder)
 
         # Now search each folder for VM
         vm = None
@@ -731,6 +1320,62 @@ class VMWareSystem(System, VmMixin, TemplateMixin):
         filter_spec.objectSet = [obj_spec]
         return filter_spec
 
+    def _retrieve_properties(self, vimtype, path_set, begin_entity=None, page_size=None,
+                             objects=None):
+        """
+        Retrieve selected properties of all objects of type ``vimtype``, one page at a time
+
+        Uses RetrievePropertiesEx/ContinueRetrievePropertiesEx so that only the requested
+        property paths of at most ``page_size`` objects are transferred per SOAP call, and no
+        further calls are made for the returned managed objects.
+
+        Args:
+            vimtype: pyVmomi managed object type, e.g. vim.VirtualMachine
+            path_set (list): property paths to retrieve, e.g. ['name', 'config.template']
+            begin_entity: object to start the inventory traversal from, defaults to rootFolder.
+                May be a vim.view.ContainerView, in which case the objects in the view are used
+            page_size (int): max objects per page, defaults to ``self.page_size``
+            objects (list): retrieve properties of exactly these managed objects instead of
+                traversing the inventory
+        Yields:
+            (managed object, dict of property path -> value) tuples
+        """
+        property_spec = vmodl.query.PropertyCollector.PropertySpec(
+            type=vimtype, all=False, pathSet=list(path_set))
+        if objects is not None:
+            if not objects:
+                return
+            filter_spec = vmodl.query.PropertyCollector.FilterSpec(
+                propSet=[property_spec],
+                objectSet=[vmodl.query.PropertyCollector.ObjectSpec(obj=obj) for obj in objects])
+        elif isinstance(begin_entity, vim.view.ContainerView):
+            # A view only needs its 'view' property traversed, it already holds the objects
+            traversal_spec = vmodl.query.PropertyCollector.TraversalSpec(
+                name='traverse_view', path='view', skip=False, type=vim.view.ContainerView)
+            filter_spec = vmodl.query.PropertyCollector.FilterSpec(
+                propSet=[property_spec],
+                objectSet=[vmodl.query.PropertyCollector.ObjectSpec(
+                    obj=begin_entity, skip=True, selectSet=[traversal_spec])])
+        else:
+            filter_spec = self._build_filter_spec(
+                begin_entity or self.content.rootFolder, property_spec)
+        options = vmodl.query.PropertyCollector.RetrieveOptions(
+            maxObjects=page_size or self.page_size)
+        property_collector = self.content.propertyCollector
+
+        result = property_collector.RetrievePropertiesEx(specSet=[filter_spec], options=options)
+        try:
+            while result:
+                for object_content in result.objects:
+                    yield object_content.obj, {p.name: p.val for p in object_content.propSet}
+                if not result.token:
+                    break
+                result = property_collector.ContinueRetrievePropertiesEx(token=result.token)
+        finally:
+            # the consumer stopped early, release the server side result set
+            if result and result.token:
+                property_collector.CancelRetrievePropertiesEx(token=result.token)
+
     def get_updated_obj(self, obj):
         """
         Build a filter spec based on ``obj`` and return the updated object.
@@ -804,42 +1449,261 @@ class VMWareSystem(System, VmMixin, TemplateMixin):
 
     def _list_vms_or_templates(self, template=False, inaccessible=False):
         """
-        Obtains a list of all VMs or templates on the system.
+        Obtains all VMs or templates on the system.
+
+        The properties are retrieved page by page (see ``page_size``), so names are yielded
+        as soon as each page arrives instead of after one response for the whole inventory.
 
         Args:
-            template: A boolean describing if a list of templates should be returned
+            template: A boolean describing if templates should be returned
+            inaccessible: A boolean describing if inaccessible VMs should be returned too
 
-        Returns: A list of vim.VirtualMachine objects
+        Yields: names of the vim.VirtualMachine objects
         """
-        # Use some pyVmomi internals to get vm propsets back directly with requested properties,
-        # so we skip the network overhead of returning full managed objects
-        property_spec = vmodl.query.PropertyCollector.PropertySpec()
-        property_spec.all = False
-        property_spec.pathSet = [
-            'name', 'config.template',
-            'config.uuid', 'runtime.connectionState'
-        ]
-        property_spec.type = vim.VirtualMachine
-        pfs = self._build_filter_spec(self.content.rootFolder, property_spec)
-        object_contents = self.content.propertyCollector.RetrieveProperties(specSet=[pfs])
-
         # Ensure get_template is either True or False to match the config.template property
         get_template = bool(template)
 
+        # Only request the properties we filter on, so we skip the network overhead of
+        # returning full managed objects
+        vm_properties = self._retrieve_properties(
+            vim.VirtualMachine,
+            ['name', 'config.template', 'config.uuid', 'runtime.connectionState'])
+
         # Select the vms or templates based on get_template and the returned properties
-        obj_list = []
-        for object_content in object_contents:
-            # Nested property lookups work, but the attr lookup on the
-            # vm object still triggers a request even though the vm
-            # object already "knows" the answer in its cached object
-            # content. So we just pull the value straight out of the cache.
-            vm_props = {p.name: p.val for p in object_content.propSet}
+        for _, vm_props in vm_properties:
             if vm_props.get('config.template') == get_template:
                 if (vm_props.get('runtime.connectionState') == "inaccessible" and
                         inaccessible) or vm_props.get(
                             'runtime.connectionState') != "inaccessible":
-                    obj_list.append(vm_props['name'])
-        return obj_list
+                    yield vm_props['name']
+
+    def _get_vm_objs(self, vms):
+        """
+        Get the pyVmomi objects of many VMs, resolving the ones without raw data in one
+        property retrieval instead of a folder search per VM
+
+        Args:
+            vms (list): VMWareVirtualMachine/VMWareTemplate objects
+        Returns:
+            dict of vm name -> vim.VirtualMachine, or None if the VM was not found
+        """
+        vm_objs = {vm.name: vm._raw for vm in vms}
+        unresolved = {name for name, obj in vm_objs.items() if obj is None}
+        if unresolved:
+            for obj, props in self._retrieve_properties(vim.VirtualMachine, ['name']):
+                if props.get('name') in unresolved:
+                    vm_objs[props['name']] = obj
+        return vm_objs
+
+    def _power_task_finished(self, task, state, tasks, failed):
+        """
+        Handle a power task of ``_wait_for_power_state`` reaching ``state``
+
+        The VMs of a failed task are added to ``failed``. A successful PowerOnMultiVM_Task
+        has started a task per VM, or reports why a VM was not attempted (e.g. DRS in manual
+        mode), so those VMs fail too.
+
+        Returns:
+            dict of the tasks started by a PowerOnMultiVM_Task -> list with their VM
+        """
+        if state == 'error':
+            self.logger.error("Power task of VMs %s failed: %s",
+                              ', '.join(str(obj) for obj in tasks[task]),
+                              get_task_error_message(task))
+            failed.update(tasks[task])
+        elif state == 'success':
+            result = task.info.result
+            for not_attempted in getattr(result, 'notAttempted', None) or []:
+                self.logger.error("Power on of VM %s was not attempted: %s", not_attempted.vm,
+                                  getattr(not_attempted.fault, 'localizedMessage', ''))
+                failed.add(not_attempted.vm)
+            return {
+                attempted.task: [attempted.vm]
+                for attempted in getattr(result, 'attempted', None) or [] if attempted.task}
+        return {}
+
+    def _wait_for_power_state(self, vm_objs, power_state, timeout=600, tasks=None):
+        """
+        Wait for many VMs to reach a power state, through one property collector
+
+        A private property collector is subscribed to ``runtime.powerState`` of all the VMs
+        and ``info.state`` of the power tasks, and WaitForUpdatesEx returns only the changes,
+        instead of polling each VM.
+
+        Args:
+            vm_objs (list): vim.VirtualMachine objects
+            power_state (string): vim.VirtualMachinePowerState value, e.g. 'poweredOn'
+            timeout: seconds to wait for
+            tasks (dict): vim.Task -> list of the vim.VirtualMachine objects it changes, the
+                VMs of a task which fails are not waited for anymore
+        Returns:
+            set of the vim.VirtualMachine objects which did not reach ``power_state``
+        """
+        states = {obj: None for obj in vm_objs}
+        if not states:
+            return set()
+        tasks = dict(tasks or {})
+        failed = set()
+        # a collector of our own, so we don't consume updates meant for get_updated_obj
+        collector = self.content.propertyCollector.CreatePropertyCollector()
+
+        def _subscribe(objs, vimtype, path):
+            collector.CreateFilter(vmodl.query.PropertyCollector.FilterSpec(
+                propSet=[vmodl.query.PropertyCollector.PropertySpec(
+                    type=vimtype, all=False, pathSet=[path])],
+                objectSet=[vmodl.query.PropertyCollector.ObjectSpec(obj=obj) for obj in objs]),
+                True)
+
+        try:
+            _subscribe(states, vim.VirtualMachine, 'runtime.powerState')
+            if tasks:
+                _subscribe(tasks, vim.Task, 'info.state')
+            version = ''
+            deadline = time.time() + timeout
+            while any(state != power_state
+                      for obj, state in states.items() if obj not in failed):
+                remaining = int(deadline - time.time())
+                if remaining <= 0:
+                    break
+                update = collector.WaitForUpdatesEx(
+                    version, vmodl.query.PropertyCollector.WaitOptions(
+                        maxWaitSeconds=min(remaining, 60)))
+                if update is None:
+                    # no changes within maxWaitSeconds
+                    continue
+                version = update.version
+                for filter_update in update.filterSet:
+                    for object_update in filter_update.objectSet:
+                        for change in object_update.changeSet:
+                            if change.name == 'runtime.powerState':
+                                states[object_update.obj] = str(change.val)
+                            elif change.name == 'info.state':
+                                started = self._power_task_finished(
+                                    object_update.obj, str(change.val), tasks, failed)
+                                if started:
+                                    tasks.update(started)
+                                    _subscribe(started, vim.Task, 'info.state')
+        finally:
+            collector.Destroy()
+        return {obj for obj, state in states.items() if state != power_state}
+
+    def _power_many(self, vms, power_state, timeout):
+        vm_objs = self._get_vm_objs(vms)
+        missing = [name for name, obj in vm_objs.items() if obj is None]
+        if missing:
+            raise VMInstanceNotFound(', '.join(missing))
+        names_by_obj = {obj: name for name, obj in vm_objs.items()}
+
+        # skip the VMs which are already there, their tasks would only fail
+        to_change = [
+            obj for obj, props in self._retrieve_properties(
+                vim.VirtualMachine, ['runtime.powerState'], objects=list(names_by_obj))
+            if str(props.get('runtime.powerState')) != power_state]
+        tasks = {}
+        if to_change:
+            self.logger.info(" Changing power state of %d vSphere VMs to %s",
+                             len(to_change), power_state)
+            datacenters = self.get_obj_list(vim.Datacenter)
+            if power_state == 'poweredOn' and len(datacenters) == 1:
+                tasks[datacenters[0].PowerOnMultiVM_Task(vm=to_change)] = to_change
+            elif power_state == 'poweredOn':
+                for obj in to_change:
+                    tasks[obj.PowerOnVM_Task()] = [obj]
+            else:
+                for obj in to_change:
+                    tasks[obj.PowerOffVM_Task()] = [obj]
+
+        failed = self._wait_for_power_state(
+            to_change, power_state, timeout=timeout, tasks=tasks)
+        if failed:
+            self.logger.error("VMs did not reach power state %s: %s",
+                              power_state, ', '.join(names_by_obj[obj] for obj in failed))
+        return not failed
+
+    def power_on_many(self, vms, timeout=600):
+        """
+        Power on many VMs at once
+
+        Uses a single Datacenter.PowerOnMultiVM_Task if there is only one datacenter,
+        otherwise all PowerOnVM_Task are started without waiting for each other. Completion
+        of all of them is tracked through one property collector subscription.
+
+        Args:
+            vms (list): VMWareVirtualMachine objects
+            timeout: seconds to wait for all VMs to be powered on
+        Returns:
+            True if all VMs are powered on, False otherwise
+        """
+        return self._power_many(vms, 'poweredOn', timeout)
+
+    def power_off_many(self, vms, timeout=600):
+        """
+        Power off many VMs at once
+
+        All PowerOffVM_Task are started without waiting for each other, and completion of
+        all of them is tracked through one property collector subscription.
+
+        Args:
+            vms (list): VMWareVirtualMachine objects
+            timeout: seconds to wait for all VMs to be powered off
+        Returns:
+            True if all VMs are powered off, False otherwise
+        """
+        return self._power_many(vms, 'poweredOff', timeout)
+
+    def get_creation_times(self, vms, page_size=1000):
+        """Detect the creation time of many VMs at once
+
+        Uses a single event collector over the whole inventory, paged through with
+        ReadNextEvents, instead of one collector per VM. VMs with no deploy/create event fall
+        back to their last boot time, retrieved for all of them in one property retrieval.
+
+        Args:
+            vms (list): VMWareVirtualMachine objects
+            page_size (int): number of events read per ReadNextEvents call (1000 max)
+        Returns:
+            dict of vm name -> tz-aware UTC datetime, or None if no creation date was found
+        """
+        vm_objs = self._get_vm_objs(vms)
+        names_by_obj = {obj: name for name, obj in vm_objs.items() if obj is not None}
+
+        creation_times = {}
+        filter_spec = vim.event.EventFilterSpec(
+            entity=vim.event.EventFilterSpec.ByEntity(
+                entity=self.content.rootFolder,
+                recursion=vim.event.EventFilterSpec.RecursionOption.all),
+            eventTypeId=['VmDeployedEvent', 'VmCreatedEvent'])
+        collector = self.content.eventManager.CreateCollectorForEvents(filter=filter_spec)
+        try:
+            collector.RewindCollector()
+            while True:
+                events = collector.ReadNextEvents(maxCount=page_size)
+                if not events:
+                    break
+                for event in events:
+                    name = names_by_obj.get(event.vm.vm) if event.vm else None
+                    if name and (name not in creation_times
+                                 or event.createdTime > creation_times[name]):
+                        creation_times[name] = event.createdTime
+        finally:
+            collector.DestroyCollector()  # limited number of collectors allowed per client
+
+        # no events found for these VMs, fallback to last boot time
+        missing = [obj for obj, name in names_by_obj.items() if name not in creation_times]
+        for obj, props in self._retrieve_properties(
+                vim.VirtualMachine, ['runtime.bootTime'], objects=missing):
+            if props.get('runtime.bootTime'):
+                creation_times[names_by_obj[obj]] = props['runtime.bootTime']
+
+        result = {}
+        for name in vm_objs:
+            creation_time = creation_times.get(name)
+            if not creation_time:
+                self.logger.warning('Could not find a creation date for %s', name)
+                result[name] = None
+            else:
+                result[name] = creation_time.astimezone(pytz.UTC)
+        return result
 
     def get_vm_from_ip(self, ip):
         """ Gets the name of a vm from its IP.
@@ -871,9 +1735,54 @@ class VMWareSystem(System, VmMixin, TemplateMixin):
         else:
             raise VMNotFoundViaIP('The requested IP is not known as a VM')
 
+    def get_vms_from_ips(self, ips):
+        """ Gets the VMs for many IPs at once.
+
+        Instead of one FindAllByIp search per address, the names, guest IPs and boot times of
+        all VMs are retrieved in one paged property retrieval and indexed by IP. Like
+        ``get_vm_from_ip``, if multiple VMs reported the same IP, the one with the latest boot
+        time wins.
+
+        Args:
+            ips (list): ip addresses of the vms
+        Returns: dict of ip -> VMWareVirtualMachine, or None if the IP is not known as a VM
+        """
+        wanted_ips = set(ips)
+        epoch = datetime.fromtimestamp(0, pytz.UTC)
+        newest = {}  # ip -> (boot time, vm obj, vm name)
+        vm_properties = self._retrieve_properties(
+            vim.VirtualMachine,
+            ['name', 'config.template', 'guest.net', 'summary.guest.ipAddress',
+             'runtime.bootTime'])
+        for vm_obj, vm_props in vm_properties:
+            if vm_props.get('config.template'):
+                continue
+            vm_ips = set()
+            if vm_props.get('summary.guest.ipAddress'):
+                vm_ips.add(vm_props['summary.guest.ipAddress'])
+            for nic in vm_props.get('guest.net') or []:
+                vm_ips.update(nic.ipAddress or [])
+            boot_time = vm_props.get('runtime.bootTime') or epoch
+            for ip in vm_ips & wanted_ips:
+                if ip not in newest or boot_time > newest[ip][0]:
+                    newest[ip] = (boot_time, vm_obj, vm_props['name'])
+
+        vms = {}
+        for ip in wanted_ips:
+            if ip in newest:
+                _, vm_obj, vm_name = newest[ip]
+                vms[ip] = VMWareVirtualMachine(system=self, name=vm_name, raw=vm_obj)
+            else:
+                vms[ip] = None
+        return vms
+
     def is_host_connected(self, host_name):
-        host = self.get_obj(vim.HostSystem, name=host_name)
-        return host.summary.runtime.connectionState == "connected"
+        def _is_connected(host):
+            for _, props in self._retrieve_properties(
+                    vim.HostSystem, ['summary.runtime.connectionState'], objects=[host]):
+                return props.get('summary.runtime.connectionState') == "connected"
+            return False
+        return self._call_with_obj(vim.HostSystem, host_name, _is_connected)
 
     def create_vm(self, vm_name):
         raise NotImplementedError('This function has not yet been implemented.')
@@ -908,20 +1817,27 @@ class VMWareSystem(System, VmMixin, TemplateMixin):
         return vm
 
     def list_host(self):
-        return [str(h.name) for h in self.get_obj_list(vim.HostSystem)]
+        return self._list_obj_names(vim.HostSystem)
 
     def list_host_datastore_url(self, host_name):
-        host = self.get_obj(vim.HostSystem, name=host_name)
-        return [str(d.summary.url) for d in host.datastore]
+        return self._call_with_obj(
+            vim.HostSystem, host_name,
+            lambda host: [str(d.summary.url) for d in host.datastore])
 
     def list_datastore(self):
-        return [str(h.name) for h in self.get_obj_list(vim.Datastore) if h.host]
+        view = self._get_container_view(vim.Datastore)
+        return [
+            str(props['name'])
+            for _, props in self._retrieve_properties(
+                vim.Datastore, ['name', 'host'], begin_entity=view)
+            if props.get('host')
+        ]
 
     def list_cluster(self):
-        return [str(h.name) for h in self.get_obj_list(vim.ClusterComputeResource)]
+        return self._list_obj_names(vim.ClusterComputeResource)
 
     def list_resource_pools(self):
-        return [str(h.name) for h in self.get_obj_list(vim.ResourcePool)]
+        return self._list_obj_names(vim.ResourcePool)
 
     def info(self):
         # NOTE: Can't find these two methods in either psphere or suds
@@ -929,7 +1845,9 @@ class VMWareSystem(System, VmMixin, TemplateMixin):
         return '{} {}'.format(self.content.about.apiType, self.content.about.apiVersion)
 
     def disconnect(self):
-        pass
+        # the session and its container views stay pooled for other systems
+        self._obj_name_cache.clear()
+        self._thread_local = threading.local()
 
     def _task_wait(self, task):
         """
@@ -957,7 +1875,8 @@ class VMWareSystem(System, VmMixin, TemplateMixin):
         return task.info.state
 
     def remove_host_from_cluster(self, host_name):
-        host = self.get_obj(vim.HostSystem, name=host_name)
+        # reading the name checks that the (maybe cached) host still exists
+        host = self._call_with_obj(vim.HostSystem, host_name, lambda host: host.name and host)
         task = host.DisconnectHost_Task()
         status, _ = wait_for(self._task_wait, [task])
 
@@ -967,6 +1886,8 @@ class VMWareSystem(System, VmMixin, TemplateMixin):
 
         task = host.Destroy_Task()
         status, _ = wait_for(self._task_wait, [task], fail_condition=None)
+        if status == 'success':
+            self._forget_obj(vim.HostSystem, host_name)
 
         return status == 'success'
 
@@ -975,24 +1896,24 @@ class VMWareSystem(System, VmMixin, TemplateMixin):
         installed_cpu = 0
         used_ram = 0
         used_cpu = 0
-        for host in self.get_obj_list(vim.HostSystem):
-            installed_ram += host.systemResources.config.memoryAllocation.limit
-            installed_cpu += host.summary.hardware.numCpuCores
-
-        property_spec = vmodl.query.PropertyCollector.PropertySpec()
-        property_spec.all = False
-        property_spec.pathSet = ['name', 'config.template']
-        property_spec.type = vim.VirtualMachine
-        pfs = self._build_filter_spec(self.content.rootFolder, property_spec)
-        object_contents = self.content.propertyCollector.RetrieveProperties(specSet=[pfs])
-        for vm in object_contents:
-            vm_props = {p.name: p.val for p in vm.propSet}
+        host_properties = self._retrieve_properties(
+            vim.HostSystem,
+            ['systemResources.config.memoryAllocation.limit', 'summary.hardware.numCpuCores'])
+        for _, host_props in host_properties:
+            installed_ram += host_props.get('systemResources.config.memoryAllocation.limit') or 0
+            installed_cpu += host_props.get('summary.hardware.numCpuCores') or 0
+
+        vm_properties = self._retrieve_properties(
+            vim.VirtualMachine,
+            ['config.template', 'summary.runtime.powerState',
+             'summary.config.memorySizeMB', 'summary.config.numCpu'])
+        for _, vm_props in vm_properties:
             if vm_props.get('config.template'):
                 continue
-            if vm.obj.summary.runtime.powerState.lower() != 'poweredon':
+            if str(vm_props.get('summary.runtime.powerState')).lower() != 'poweredon':
                 continue
-            used_ram += vm.obj.summary.config.memorySizeMB
-            used_cpu += vm.obj.summary.config.numCpu
+            used_ram += vm_props.get('summary.config.memorySizeMB') or 0
+            used_cpu += vm_props.get('summary.config.numCpu') or 0
 
         return {
             # RAM